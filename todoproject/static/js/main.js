@@ -1,36 +1,229 @@
 document.addEventListener('DOMContentLoaded', function() {
-    // タスク完了状態の切り替え
-    document.querySelectorAll('.toggle-complete').forEach(button => {
-        button.addEventListener('click', function(e) {
-            e.preventDefault();
-            const taskId = this.dataset.taskId;
-            const csrftoken = document.querySelector('[name=csrfmiddlewaretoken]').value;
-
-            fetch(`/task/${taskId}/toggle/`, {
-                method: 'POST',
-                headers: {
-                    'X-CSRFToken': csrftoken,
-                    'Content-Type': 'application/json',
-                },
-            })
-            .then(response => response.json())
-            .then(data => {
-                if (data.status === 'success') {
-                    const row = this.closest('tr');
-                    row.classList.toggle('text-decoration-line-through');
-                    this.textContent = data.completed ? '未対応にする' : '完了にする';
+    const csrftoken = document.querySelector('[name=csrfmiddlewaretoken]').value;
+
+    // 行の表示を完了状態に合わせる
+    function applyCompleted(row, completed) {
+        row.classList.toggle('task-completed', completed);
+        // アーカイブしたタスクは未完了に戻すと通常のタスクになる
+        row.classList.remove('task-archived');
+        const status = row.querySelector('.task-status');
+        if (status) {
+            status.textContent = completed ? '完了' : '未完了';
+        }
+        const button = row.querySelector('.toggle-complete');
+        if (button) {
+            button.textContent = completed ? '未完了にする' : '完了にする';
+        }
+    }
+
+    // 行の表示を優先度に合わせる
+    function applyPriority(row, priority) {
+        row.className = row.className.replace(/priority-\w+/, `priority-${priority}`);
+        const select = row.querySelector('.inline-priority');
+        if (select) {
+            select.value = priority;
+        }
+    }
+
+    // タスク完了状態の切り替え（変更の配信で追加した行にも効くよう document で受け取る）
+    document.addEventListener('click', function(e) {
+        const button = e.target.closest('.toggle-complete');
+        if (!button) {
+            return;
+        }
+        e.preventDefault();
+        const taskId = button.dataset.taskId;
+
+        fetch(`/task/${taskId}/toggle/`, {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': csrftoken,
+                'Content-Type': 'application/json',
+            },
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.status === 'success') {
+                applyCompleted(button.closest('tr'), data.completed);
+            }
+        })
+        .catch(error => console.error('Error:', error));
+    });
+
+    // 一覧からその場で優先度を変更する（変更した列だけを PATCH で送る）
+    document.addEventListener('change', function(e) {
+        const select = e.target.closest('.inline-priority');
+        if (!select) {
+            return;
+        }
+        const row = select.closest('tr');
+
+        fetch(`/api/tasks/${select.dataset.taskId}/`, {
+            method: 'PATCH',
+            headers: {
+                'X-CSRFToken': csrftoken,
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({priority: select.value}),
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.status === 'success') {
+                applyPriority(row, data.task.priority);
+            }
+        })
+        .catch(error => console.error('Error:', error));
+    });
+
+    // 一括操作（選択した行を1回のリクエストで処理する）
+    const table = document.querySelector('table[data-bulk-url]');
+    if (table) {
+        const selectAll = table.querySelector('.select-all');
+        if (selectAll) {
+            selectAll.addEventListener('change', function() {
+                table.querySelectorAll('.select-task').forEach(box => {
+                    box.checked = this.checked;
+                });
+            });
+        }
+
+        document.querySelectorAll('.bulk-action').forEach(button => {
+            button.addEventListener('click', function() {
+                const action = this.dataset.action;
+                const ids = Array.from(table.querySelectorAll('.select-task:checked'))
+                    .map(box => parseInt(box.value, 10));
+                if (ids.length === 0) {
+                    return;
+                }
+                if (action === 'delete' && !confirm(`${ids.length}件のタスクを削除しますか？`)) {
+                    return;
                 }
-            })
-            .catch(error => console.error('Error:', error));
+
+                fetch(table.dataset.bulkUrl, {
+                    method: 'POST',
+                    headers: {
+                        'X-CSRFToken': csrftoken,
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify({action: action, ids: ids}),
+                })
+                .then(response => response.json())
+                .then(data => {
+                    if (data.status !== 'success') {
+                        return;
+                    }
+                    (data.tasks || []).forEach(task => {
+                        const row = table.querySelector(`tr[data-task-id="${task.id}"]`);
+                        if (row) {
+                            applyCompleted(row, task.completed);
+                        }
+                    });
+                    (data.deleted || []).forEach(id => {
+                        const row = table.querySelector(`tr[data-task-id="${id}"]`);
+                        if (row) {
+                            row.remove();
+                        }
+                    });
+                    table.querySelectorAll('.select-task:checked, .select-all:checked').forEach(box => {
+                        box.checked = false;
+                    });
+                })
+                .catch(error => console.error('Error:', error));
+            });
         });
-    });
+    }
+
+    // 別のタブや端末での変更を受け取り、一覧の行に反映する（Server-Sent Events）
+    const taskTable = document.querySelector('.task-table[data-events-url]');
+    if (taskTable && window.EventSource) {
+        const stale = document.querySelector('.task-list-stale');
+        const rowTemplate = document.getElementById('task-row-template');
+        const findRow = id => taskTable.querySelector(`tr[data-task-id="${id}"]`);
+
+        // 行に反映できない変更は、再読み込みを促す
+        const showStale = () => stale && stale.classList.remove('d-none');
+
+        const applyTask = (row, task) => {
+            if ('title' in task) {
+                row.querySelector('.task-title').textContent = task.title;
+            }
+            if ('due_date' in task) {
+                row.querySelector('.task-due').textContent = task.due_date_display;
+            }
+            if ('priority' in task) {
+                applyPriority(row, task.priority);
+            }
+            if ('category' in task) {
+                row.querySelector('.category-indicator').style.backgroundColor = task.category ? task.category.color : '';
+                row.querySelector('.task-category').textContent = task.category ? task.category.name : '';
+            }
+            if ('completed' in task) {
+                applyCompleted(row, task.completed);
+            }
+        };
+
+        const insertTask = task => {
+            const tbody = taskTable.querySelector('tbody');
+            // ひな形の行の主キー（0）を新しいタスクの主キーに置き換える
+            const html = rowTemplate.innerHTML
+                .replace(/data-task-id="0"/g, `data-task-id="${task.id}"`)
+                .replace(/value="0"/, `value="${task.id}"`)
+                .replace(/\/task\/0\//g, `/task/${task.id}/`);
+            tbody.insertAdjacentHTML('afterbegin', html);
+            applyTask(tbody.firstElementChild, task);
+            // 「タスクがありません」の行と、1ページの件数を超えた行を消す
+            tbody.querySelectorAll('tr:not([data-task-id])').forEach(row => row.remove());
+            const rows = tbody.querySelectorAll('tr[data-task-id]');
+            for (let i = parseInt(taskTable.dataset.perPage, 10); i < rows.length; i++) {
+                rows[i].remove();
+            }
+        };
 
-    // アラートの自動消去
-    document.querySelectorAll('.alert').forEach(alert => {
+        const source = new EventSource(taskTable.dataset.eventsUrl);
+        source.addEventListener('message', e => {
+            const event = JSON.parse(e.data);
+            switch (event.type) {
+            case 'create':
+                if ('liveInsert' in taskTable.dataset && rowTemplate && !findRow(event.task.id)) {
+                    insertTask(event.task);
+                } else {
+                    showStale();
+                }
+                break;
+            case 'update': {
+                const row = findRow(event.task.id);
+                if (row) {
+                    applyTask(row, event.task);
+                }
+                break;
+            }
+            case 'toggle':
+                event.tasks.forEach(task => {
+                    const row = findRow(task.id);
+                    if (row) {
+                        applyCompleted(row, task.completed);
+                    }
+                });
+                break;
+            case 'delete':
+                event.ids.forEach(id => {
+                    const row = findRow(id);
+                    if (row) {
+                        row.remove();
+                    }
+                });
+                break;
+            default:
+                showStale();
+            }
+        });
+    }
+
+    // アラートの自動消去（変更の通知は残す）
+    document.querySelectorAll('.alert:not(.task-list-stale)').forEach(alert => {
         setTimeout(() => {
             alert.classList.remove('show');
             setTimeout(() => alert.remove(), 150);
         }, 3000);
     });
 });
-
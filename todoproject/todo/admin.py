@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Category, Task
+from .models import ArchivedTask, Category, Task
 
 admin.site.register(Category)
-admin.site.register(Task)
\ No newline at end of file
+admin.site.register(Task)
+admin.site.register(ArchivedTask)
\ No newline at end of file
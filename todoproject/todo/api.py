@@ -0,0 +1,265 @@
+"""
+タスクとカテゴリのJSON API
+
+一覧と同じフィルタリング・ソート（filter_tasks / sort_tasks）を使い、
+モデルインスタンスを作らずに values() の行から直接JSONを作る。
+
+GET api/tasks/                  タスクの一覧（カーソル方式のページネーション）
+GET api/tasks/?ids=1,2,3        IDを指定した複数のタスク
+GET api/tasks/<pk>/             1件のタスク
+PATCH api/tasks/<pk>/           タスクの列（title / due_date / priority / category）を変更する
+GET api/categories/             カテゴリの一覧
+
+fields=title,due_date のように返す列を指定すると、その列だけをSELECTする（id は常に返す）。
+"""
+
+import json
+from functools import wraps
+
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET, require_http_methods
+
+from .caches import category_cache, task_list_cache
+from .events import task_payload
+from .forms import TaskForm
+from .metrics import query_budget
+from .models import Task
+from .pagination import KeysetPaginator
+from .signals import tasks_changed
+from .views import filter_tasks, sort_tasks
+
+# APIで返すタスクの列（category はカテゴリID）
+API_TASK_FIELDS = (
+    'id',
+    'title',
+    'description',
+    'due_date',
+    'completed',
+    'priority',
+    'category',
+    'created_date',
+    'updated_at',
+)
+
+# 一覧の1ページあたりの件数（limit で指定できる上限）
+API_DEFAULT_LIMIT = 50
+API_MAX_LIMIT = 200
+
+# ids= で1回に取得できるタスク数の上限
+API_BATCH_MAX_IDS = 100
+
+# PATCH で変更できる列（一覧からのその場での編集用）
+API_EDITABLE_FIELDS = ('title', 'due_date', 'priority', 'category')
+
+
+class ApiError(Exception):
+    """リクエストのパラメータが不正（400を返す）"""
+
+
+def api_login_required(view_func):
+    """未ログインの場合、ログインページへリダイレクトせずに401のJSONを返す"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'status': 'error', 'message': 'ログインが必要です'}, status=401)
+        try:
+            return view_func(request, *args, **kwargs)
+        except ApiError as e:
+            return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return wrapper
+
+
+def parse_fields(value):
+    """fields パラメータを返す列のタプルにする（省略時は全列）
+
+    Raises:
+        ApiError: 存在しない列を指定した場合
+    """
+    if not value:
+        return API_TASK_FIELDS
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in API_TASK_FIELDS]
+    if unknown:
+        raise ApiError(f'不明な列です: {", ".join(unknown)}')
+    # id は常に返し、指定された順に関わらず API_TASK_FIELDS の順にする
+    return tuple(name for name in API_TASK_FIELDS if name == 'id' or name in names)
+
+
+def parse_ids(value):
+    """ids パラメータ（カンマ区切り）を重複のないIDのリストにする
+
+    Raises:
+        ApiError: 数値でないIDがある、または上限を超えた場合
+    """
+    try:
+        ids = list(dict.fromkeys(int(pk) for pk in value.split(',') if pk.strip()))
+    except ValueError:
+        raise ApiError('ids は数値をカンマで区切って指定してください')
+    if len(ids) > API_BATCH_MAX_IDS:
+        raise ApiError(f'ids は{API_BATCH_MAX_IDS}件までです')
+    return ids
+
+
+def parse_limit(value):
+    if not value:
+        return API_DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ApiError('limit は数値で指定してください')
+    return max(1, min(limit, API_MAX_LIMIT))
+
+
+def parse_changes(body):
+    """PATCH のJSONボディを検証し、UPDATEする列と値の辞書にする
+
+    値は TaskForm のフィールドで検証する（カテゴリはカテゴリキャッシュで確認するためクエリを発行しない）。
+
+    Returns:
+        dict: モデルの列名（category は category_id）と値
+
+    Raises:
+        ApiError: JSONでない、変更できない列がある、または値が不正な場合
+    """
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise ApiError('リクエストボディはJSONで指定してください')
+    if not isinstance(payload, dict) or not payload:
+        raise ApiError('変更する列を指定してください')
+    unknown = [name for name in payload if name not in API_EDITABLE_FIELDS]
+    if unknown:
+        raise ApiError(f'変更できない列です: {", ".join(unknown)}')
+    changes = {}
+    for name, value in payload.items():
+        try:
+            value = TaskForm.base_fields[name].clean(value)
+        except ValidationError as e:
+            raise ApiError(f'{name}: {" ".join(e.messages)}')
+        if name == 'category':
+            changes['category_id'] = value.pk if value is not None else None
+        else:
+            changes[name] = value
+    return changes
+
+
+def task_rows(tasks, fields, extra=()):
+    """タスクのクエリセットを、指定した列（と extra の列）だけを読む values() にする
+
+    Args:
+        tasks (QuerySet): タスクのクエリセット
+        fields (tuple): 返す列（API_TASK_FIELDS のうち）
+        extra (Iterable[str]): 返さないがSELECTに含める列（カーソルの値など）
+
+    Returns:
+        QuerySet: 辞書を返すクエリセット
+    """
+    return tasks.values(*dict.fromkeys([*fields, *extra]))
+
+
+def serialize_task(row, fields):
+    """values() の1行を返す列だけの辞書にする"""
+    return {name: row[name] for name in fields}
+
+
+@query_budget(4)
+@require_GET
+@api_login_required
+def task_collection(request):
+    """タスクの一覧、または ids= で指定した複数のタスクを返す
+
+    一覧は task_list と同じ category / priority / completed / search / sort で
+    絞り込み・並び替え、cursor と limit でページを指定する。
+
+    Args:
+        request (HttpRequest): HTTPリクエストオブジェクト
+
+    Returns:
+        JsonResponse: {"tasks": [...], "next_cursor": ..., "previous_cursor": ...}。
+            ids= の場合は {"tasks": [...], "missing": [見つからなかったID]}（tasks は指定した順）
+    """
+    fields = parse_fields(request.GET.get('fields'))
+    tasks = Task.objects.filter(user=request.user)
+
+    if 'ids' in request.GET:
+        ids = parse_ids(request.GET['ids'])
+        rows = {row['id']: row for row in task_rows(tasks.filter(pk__in=ids), fields)}
+        return JsonResponse({
+            'tasks': [serialize_task(rows[pk], fields) for pk in ids if pk in rows],
+            'missing': [pk for pk in ids if pk not in rows],
+        })
+
+    params = task_list_cache.normalize(request.GET)
+    tasks = filter_tasks(
+        tasks, params.get('category'), params.get('priority'), params.get('completed'), params.get('search', ''),
+    )
+    tasks = sort_tasks(tasks, params.get('sort', '-created_date'))
+    # カーソルは並び替えの列の値から作るため、指定されていなくてもSELECTに含める
+    ordering = [name.lstrip('-') for name in tasks.query.order_by]
+    paginator = KeysetPaginator(task_rows(tasks, fields, extra=ordering), parse_limit(request.GET.get('limit')))
+    page = paginator.get_page(params.get('cursor'))
+    return JsonResponse({
+        'tasks': [serialize_task(row, fields) for row in page],
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+    })
+
+
+# PATCH は集計行の更新（初回は作成）を含むため、書き込みのビューと同じ上限にする
+@query_budget(15)
+@require_http_methods(['GET', 'PATCH'])
+@api_login_required
+def task_item(request, pk):
+    """1件のタスクを返す（fields= で列を指定できる）、または PATCH で列を変更する
+
+    PATCH のボディは {"priority": "high"} のように変更する列だけを指定したJSON。
+    インスタンスを読み込まず、ユーザーで絞り込んだUPDATE文で更新する（Task.objects.update_task）。
+
+    Args:
+        request (HttpRequest): HTTPリクエストオブジェクト
+        pk (int): タスクのプライマリーキー
+
+    Returns:
+        JsonResponse: {"task": {...}}（PATCH では id と変更した列）。存在しない場合は404
+    """
+    if request.method == 'PATCH':
+        changes = parse_changes(request.body)
+        if not Task.objects.update_task(request.user, pk, changes):
+            return JsonResponse({'status': 'error', 'message': 'タスクが見つかりません'}, status=404)
+        tasks_changed(request.user.pk, {'type': 'update', 'task': task_payload(pk, changes)})
+        task = {'id': pk}
+        for name, value in changes.items():
+            task['category' if name == 'category_id' else name] = value
+        return JsonResponse({'status': 'success', 'task': task})
+
+    fields = parse_fields(request.GET.get('fields'))
+    row = task_rows(Task.objects.filter(user=request.user, pk=pk), fields).first()
+    if row is None:
+        return JsonResponse({'status': 'error', 'message': 'タスクが見つかりません'}, status=404)
+    return JsonResponse({'task': serialize_task(row, fields)})
+
+
+@query_budget(4)
+@require_GET
+@api_login_required
+def category_collection(request):
+    """カテゴリの一覧を返す（カテゴリキャッシュから返すためクエリを発行しない）
+
+    Args:
+        request (HttpRequest): HTTPリクエストオブジェクト
+
+    Returns:
+        JsonResponse: {"categories": [{"id", "name", "display_name", "color"}, ...]}
+    """
+    return JsonResponse({
+        'categories': [
+            {
+                'id': category.pk,
+                'name': category.name,
+                'display_name': str(category),
+                'color': category.color,
+            }
+            for category in category_cache.all()
+        ],
+    })
@@ -1,6 +1,28 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
+
+
+def install_search_index(sender, using, **kwargs):
+    # テーブルを作り直すマイグレーションで消えた全文検索トリガーを復元する
+    from django.db import connections
+    from . import search
+
+    connection = connections[using]
+    if search.FTS_TABLE in connection.introspection.table_names():
+        search.install(connection)
 
 
 class TodoConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "todo"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .db import apply_sqlite_pragmas
+        from .metrics import add_query_recorder, install_template_timer
+
+        post_migrate.connect(install_search_index, sender=self)
+        connection_created.connect(apply_sqlite_pragmas)
+        connection_created.connect(add_query_recorder)
+        install_template_timer()
@@ -0,0 +1,204 @@
+"""
+完了してから時間の経ったタスクのアーカイブ
+
+完了済みのタスクは一覧でほとんど見られないが、todo_task に残り続けると
+絞り込み・件数（COUNT(*)）・検索が毎回その行の分も読む。archive_tasks は最終更新から
+一定の期間が過ぎた完了済みのタスクを ArchivedTask へ主キーの順のバッチで移す。
+各バッチは INSERT ... SELECT と DELETE の文で行い、タスクをPythonに読み込まない。
+
+アーカイブしたタスクは一覧で「アーカイブを含める」を指定した場合だけ表示し、
+未完了に戻すと（TaskQuerySet.toggle_completed）同じ主キーで todo_task に戻す。
+件数の集計（TaskStats）はアーカイブしたタスクも完了済みとして数えるため、
+移しても件数は変わらない。
+"""
+
+import time
+
+from django.db import connections, transaction
+from django.db.models import Value
+from django.utils import timezone
+
+from .models import ArchivedTask, Task, TaskReminder, TaskState
+from .signals import tasks_changed
+from .stats import record_changes
+
+# 1バッチで移すタスク数
+ARCHIVE_BATCH_SIZE = 1000
+
+# todo_task と ArchivedTask で共通の列（モデルのフィールド名）
+ARCHIVE_FIELDS = (
+    'id', 'title', 'description', 'created_date', 'due_date', 'completed',
+    'category', 'priority', 'user', 'updated_at',
+)
+
+
+class ArchiveResult:
+    """アーカイブの結果
+
+    Attributes:
+        archived: 移したタスク数
+        users: タスクを移したユーザー数
+        batches: 処理したバッチ数
+        elapsed: かかった秒数
+        finished: 対象の最後まで処理したか（時間の上限で止めた場合は False）
+    """
+
+    def __init__(self):
+        self.archived = 0
+        self.users = 0
+        self.batches = 0
+        self.elapsed = 0.0
+        self.finished = False
+
+
+def _columns(model):
+    qn = connections[model.objects.db].ops.quote_name
+    return [qn(model._meta.get_field(name).column) for name in ARCHIVE_FIELDS]
+
+
+def archivable(older_than, now=None):
+    """アーカイブする完了済みのタスク（最終更新が older_than より前のもの）"""
+    cutoff = (now or timezone.now()) - older_than
+    # Valueで包んで "completed = %s" の比較にし、(completed, ...) のインデックスの等価条件にする
+    return Task.objects.filter(completed=Value(True), updated_at__lt=cutoff)
+
+
+def move_to_archive(pks, now=None, older_than=None):
+    """指定した完了済みのタスクを ArchivedTask へ移す（1つのトランザクションで行う）
+
+    対象の行をロックしてから、同じ条件（完了済み・最終更新が older_than より前）で
+    INSERT ... SELECT と DELETE を行う。途中で未完了に戻されたタスクは移さない。
+    送信済みのリマインダーの記録はタスクと一緒に削除する。
+    一覧のキャッシュと最終変更日時の更新（tasks_changed）は呼び出し側で行う。
+
+    Args:
+        pks (list[int]): 移すタスクのプライマリーキー
+        now (datetime): アーカイブした日時（省略時は現在）
+        older_than (timedelta): 指定した場合は、最終更新が now - older_than より前のタスクだけを移す
+
+    Returns:
+        tuple: 移したタスク数と、タスクを移したユーザーのIDの set
+    """
+    if not pks:
+        return 0, set()
+    now = now or timezone.now()
+    connection = connections[Task.objects.db]
+    qn = connection.ops.quote_name
+    archived_at = ArchivedTask._meta.get_field('archived_at')
+    targets = Task.objects.filter(pk__in=pks, completed=True)
+    if older_than is not None:
+        targets = targets.filter(updated_at__lt=now - older_than)
+    with transaction.atomic(using=connection.alias):
+        # ロックした行だけを移す（ロックの間に完了状態や最終更新日時は変わらない）
+        rows = list(targets.select_for_update().values_list('pk', 'user_id'))
+        if not rows:
+            return 0, set()
+        locked = [pk for pk, _ in rows]
+        placeholders = ', '.join(['%s'] * len(locked))
+        where = f'{qn(Task._meta.pk.column)} IN ({placeholders}) AND {qn(Task._meta.get_field("completed").column)}'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {qn(ArchivedTask._meta.db_table)} '
+                f'({", ".join(_columns(ArchivedTask))}, {qn(archived_at.column)}) '
+                f'SELECT {", ".join(_columns(Task))}, %s FROM {qn(Task._meta.db_table)} WHERE {where}',
+                [archived_at.get_db_prep_value(now, connection), *locked],
+            )
+            TaskReminder.objects.filter(task_id__in=locked).delete()
+            # タスクごとのシグナル（件数の更新）を送らずに削除する。件数はアーカイブしたタスクも数える
+            cursor.execute(f'DELETE FROM {qn(Task._meta.db_table)} WHERE {where}', locked)
+            moved = cursor.rowcount
+    return moved, {user_id for _, user_id in rows}
+
+
+def archive_tasks(older_than, batch_size=ARCHIVE_BATCH_SIZE, time_budget=None, now=None):
+    """最終更新が older_than より前の完了済みのタスクを、主キーの順のバッチで ArchivedTask へ移す
+
+    バッチごとに別のトランザクションで移すため、途中で止めても移したバッチはそのまま残り、
+    次の実行で続きを処理する。最後にタスクを移したユーザーの一覧のキャッシュを無効にする。
+
+    Args:
+        older_than (timedelta): 完了してから（最終更新から）アーカイブするまでの期間
+        batch_size (int): 1バッチで移すタスク数
+        time_budget (float): 処理時間の上限（秒）。超えたらバッチの区切りで止める
+        now (datetime): 基準日時（省略時は現在）
+
+    Returns:
+        ArchiveResult: 処理の結果
+    """
+    now = now or timezone.now()
+    batch_size = max(1, int(batch_size))
+    result = ArchiveResult()
+    start = time.perf_counter()
+    candidates = archivable(older_than, now).order_by('pk').values_list('pk', flat=True)
+    users = set()
+    last_pk = 0
+    while True:
+        pks = list(candidates.filter(pk__gt=last_pk)[:batch_size])
+        if not pks:
+            result.finished = True
+            break
+        # 候補を選んだ後に変更されたタスクは移さないため、移した件数を数える
+        moved, moved_users = move_to_archive(pks, now, older_than)
+        users |= moved_users
+        result.batches += 1
+        result.archived += moved
+        last_pk = pks[-1]
+        if len(pks) < batch_size:
+            result.finished = True
+            break
+        if time_budget is not None and time.perf_counter() - start >= time_budget:
+            break
+    for user_id in users:
+        tasks_changed(user_id)
+    result.users = len(users)
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def restore_tasks(user, pks, using=None):
+    """アーカイブしたタスクを未完了にして todo_task に戻す（同じ主キーを使う）
+
+    件数（TaskStats）に完了→未完了の変更を反映する。一覧のキャッシュと
+    最終変更日時の更新（tasks_changed）は呼び出し側で行う。
+
+    Args:
+        user (User): タスクの所有者
+        pks (Iterable[int]): 戻すタスクのプライマリーキー
+        using (str): データベースのエイリアス
+
+    Returns:
+        dict: 戻したタスクのプライマリーキーと新しい完了状態（False）
+              （他のユーザーのタスクやアーカイブにないタスクは含まない）
+    """
+    pks = list(pks)
+    if not pks:
+        return {}
+    connection = connections[using or Task.objects.db]
+    qn = connection.ops.quote_name
+    archived = ArchivedTask.objects.using(connection.alias).filter(user=user, pk__in=pks)
+    with transaction.atomic(using=connection.alias):
+        rows = list(archived.select_for_update().values_list('pk', 'priority', 'category_id', 'due_date'))
+        if not rows:
+            return {}
+        restored = [pk for pk, *_ in rows]
+        columns = _columns(ArchivedTask)
+        # 完了状態と更新日時だけを置き換えて戻す
+        select = list(columns)
+        select[ARCHIVE_FIELDS.index('completed')] = '%s'
+        select[ARCHIVE_FIELDS.index('updated_at')] = '%s'
+        updated_at = Task._meta.get_field('updated_at').get_db_prep_value(timezone.now(), connection)
+        placeholders = ', '.join(['%s'] * len(restored))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {qn(Task._meta.db_table)} ({", ".join(_columns(Task))}) '
+                f'SELECT {", ".join(select)} FROM {qn(ArchivedTask._meta.db_table)} '
+                f'WHERE {qn(ArchivedTask._meta.pk.column)} IN ({placeholders})',
+                [False, updated_at, *restored],
+            )
+        # ArchivedTask にはシグナルも参照する表もないため、1回のDELETE文で削除される
+        ArchivedTask.objects.using(connection.alias).filter(pk__in=restored).delete()
+        record_changes(user.pk, [
+            (TaskState(True, priority, category_id, due_date), TaskState(False, priority, category_id, due_date))
+            for _, priority, category_id, due_date in rows
+        ])
+    return {pk: False for pk in restored}
@@ -0,0 +1,123 @@
+"""
+静的ファイル（CSS / JavaScript）の本番用の配信
+
+STATIC_PROFILE=production では collectstatic で次を STATIC_ROOT に書き出す：
+- 内容のハッシュを含むファイル名（css/style.3f2a….css）と manifest（{% static %} が参照する）
+- テキストのファイルを圧縮した .gz（と、brotli パッケージがあれば .br）
+
+serve_static はハッシュ付きのファイル名に1年間の immutable なキャッシュを指定し、
+Accept-Encoding に応じて圧縮済みのファイルを返す。ブラウザは2回目以降のページで
+静的ファイルを再検証せず、リクエストを送らない。
+"""
+
+import gzip
+import posixpath
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.files.base import ContentFile
+from django.http import Http404
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.static import serve
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 圧縮するファイルの拡張子と、圧縮する最小のサイズ（小さいファイルは圧縮しても減らない）
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.txt', '.html', '.json', '.map')
+COMPRESS_MIN_SIZE = 256
+
+# ハッシュ付きのファイル名のキャッシュ期間（内容が変わればファイル名が変わる）
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+# ハッシュなしのファイル名（manifest にない画像など）のキャッシュ期間
+STATIC_MAX_AGE = 60 * 60
+
+# 返す順の Content-Encoding と、圧縮済みのファイルの拡張子
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def compress(data):
+    """圧縮した内容を {拡張子: データ} で返す（元より小さくならないものは含めない）"""
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data, quality=11)
+    return {suffix: compressed for suffix, compressed in variants.items() if len(compressed) < len(data)}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ハッシュ付きのファイル名に加えて、圧縮済みのファイル（.gz / .br）を書き出す"""
+
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name is not None and not isinstance(processed, Exception):
+                names.update((name, hashed_name))
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.size(name) >= COMPRESS_MIN_SIZE:
+                with self.open(name) as f:
+                    data = f.read()
+                for suffix, compressed in compress(data).items():
+                    if self.exists(name + suffix):
+                        self.delete(name + suffix)
+                    self._save(name + suffix, ContentFile(compressed))
+
+
+def accepted_encodings(header):
+    """Accept-Encoding ヘッダーから受け付ける符号化の集合を返す（q=0 は除く）"""
+    encodings = set()
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        quality = 1.0
+        name, _, value = params.partition('=')
+        if name.strip() == 'q':
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        if coding and quality > 0:
+            encodings.add(coding)
+    return encodings
+
+
+def is_hashed(path):
+    """manifest にあるハッシュ付きのファイル名か"""
+    return path in set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+def serve_static(request, path):
+    """STATIC_ROOT のファイルを返す（STATIC_PROFILE=production 用）
+
+    Args:
+        request (HttpRequest): HTTPリクエストオブジェクト
+        path (str): STATIC_URL からのパス
+
+    Returns:
+        FileResponse: ファイル（圧縮済みのファイルがあれば Content-Encoding を付けて返す）
+
+    Raises:
+        Http404: ファイルが存在しない場合
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    if path.endswith(tuple(suffix for _, suffix in ENCODINGS)):
+        # 圧縮済みのファイルを直接は返さない
+        raise Http404
+    accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+    name = path
+    for encoding, suffix in ENCODINGS:
+        if encoding in accepted and staticfiles_storage.exists(path + suffix):
+            name = path + suffix
+            break
+    # serve は拡張子（.gz / .br）から Content-Encoding を付け、If-Modified-Since に304を返す
+    response = serve(request, name, document_root=settings.STATIC_ROOT)
+    patch_vary_headers(response, ['Accept-Encoding'])
+    if is_hashed(path):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=STATIC_MAX_AGE)
+    return response
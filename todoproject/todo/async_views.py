@@ -0,0 +1,225 @@
+"""
+タスク一覧・詳細・完了状態の切り替えの非同期版ビューと、タスクの変更の配信（task_events）
+
+一覧・詳細・切り替えは、ASGIで動かす場合（settings.TODO_ASYNC_VIEWS）に todo.urls から使う。
+同期版のビューはASGIでは1リクエストごとに sync_to_async でスレッドに
+渡されるが、こちらはイベントループ上で動き、非同期ORMでデータベースを読む。
+
+表示する内容とテンプレート、条件付きGET、キャッシュは todo.views と同じ。
+タスクはレンダリングの前に非同期ORMですべて読み込んでおく。キャッシュ（django.core.cache）は
+ネットワーク越しのもの（Redis / Memcached）でもイベントループを止めないよう、イベントループ上では
+読み書きしない。条件付きGETの値、コンテキストの作成（カテゴリのキャッシュは版数が変わるとORMで
+読み直す）と一覧のキャッシュの読み込み、レンダリングとキャッシュへの保存は、それぞれスレッドで行う。
+"""
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_POST
+
+from .caches import task_list_cache
+from .db import read_from_replica
+from .events import event_stream, toggle_event
+from .metrics import query_budget
+from .models import Task
+from .signals import tasks_changed
+from .views import (
+    render_task_table,
+    task_detail_etag,
+    task_detail_last_modified,
+    task_list_context,
+    task_list_etag,
+    task_list_last_modified,
+    task_list_paginator,
+)
+
+
+def async_login_required(view_func):
+    """非同期ビュー用の login_required
+
+    ユーザーを request.auser() で読み込み、未ログインならログインページへリダイレクトする。
+    読み込んだユーザーは request.user に入れ、以降の同期処理（テンプレートなど）で
+    クエリが発行されないようにする。
+    """
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        request.user = user
+        return await view_func(request, *args, **kwargs)
+    return wrapper
+
+
+async def _conditional(request, etag, last_modified, view):
+    """condition デコレータと同じ条件付きGETを行う
+
+    ETagと更新日時を非同期で読み込んでから使うため、デコレータではなく関数にしている。
+
+    Args:
+        request (HttpRequest): HTTPリクエストオブジェクト
+        etag (str): ETag（ない場合は None）
+        last_modified (datetime): 最終変更日時（ない場合は None）
+        view (Callable): 内容が変わっている場合にレスポンスを作るコルーチン関数
+
+    Returns:
+        HttpResponse: 304、412、または view のレスポンス
+    """
+    etag = quote_etag(etag) if etag is not None else None
+    last_modified = int(last_modified.timestamp()) if last_modified is not None else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = await view()
+    if request.method in ('GET', 'HEAD'):
+        if last_modified and not response.has_header('Last-Modified'):
+            response.headers['Last-Modified'] = http_date(last_modified)
+        if etag:
+            response.headers.setdefault('ETag', etag)
+    return response
+
+
+@query_budget(6)
+@async_login_required
+@read_from_replica
+@cache_control(private=True, no_cache=True)
+async def task_list(request):
+    """ログインユーザーのタスク一覧を表示する（todo.views.task_list の非同期版）
+
+    Args:
+        request (HttpRequest): HTTPリクエストオブジェクト
+
+    Returns:
+        HttpResponse: レンダリングされたタスク一覧ページ
+    """
+    def conditional():
+        # 最終変更日時（データベース）とカテゴリの版数（キャッシュ）を読むため、スレッドで1回にまとめる
+        return task_list_etag(request), task_list_last_modified(request)
+
+    async def view():
+        params = task_list_cache.normalize(request.GET)
+
+        def cached_table():
+            # カテゴリのキャッシュ（todo.caches.CategoryCache）は版数が変わるとORMで読み直し、
+            # 一覧のキャッシュのキーと内容もキャッシュから読むため、スレッドで行う
+            context = task_list_context(params)
+            cache_key = task_list_cache.key(request.user.pk, params)
+            return context, cache_key, task_list_cache.get(cache_key)
+
+        context, cache_key, task_table = await sync_to_async(cached_table)()
+        page_obj = None
+        if task_table is None:
+            paginator = task_list_paginator(request.user, params, context['keyset_pagination'])
+            if context['keyset_pagination']:
+                page_obj = await paginator.aget_page(params.get('cursor'))
+            else:
+                # count を先に入れておくと、get_page は COUNT(*) を発行しない
+                paginator.count = await paginator.object_list.acount()
+                page_obj = paginator.get_page(params.get('page'))
+                page_obj.object_list = [task async for task in page_obj.object_list]
+
+        def render_page(task_table):
+            if task_table is None:
+                task_table = render_task_table(context, page_obj)
+                task_list_cache.set(cache_key, task_table)
+            return render(request, 'todo/task_list.html', {**context, 'task_table': task_table})
+
+        return await sync_to_async(render_page)(task_table)
+
+    return await _conditional(request, *await sync_to_async(conditional)(), view)
+
+
+@query_budget(5)
+@async_login_required
+@read_from_replica
+@cache_control(private=True, no_cache=True)
+async def task_detail(request, pk):
+    """タスクの詳細を表示する（todo.views.task_detail の非同期版）
+
+    Args:
+        request (HttpRequest): HTTPリクエストオブジェクト
+        pk (int): タスクのプライマリーキー
+
+    Returns:
+        HttpResponse: レンダリングされたタスク詳細ページ
+
+    Raises:
+        Http404: 指定されたタスクが存在しない場合
+    """
+    def conditional():
+        # 更新日時（データベース）とカテゴリの版数（キャッシュ）を読むため、スレッドで1回にまとめる
+        return task_detail_etag(request, pk), task_detail_last_modified(request, pk)
+
+    async def view():
+        try:
+            task = await Task.objects.aget(pk=pk, user=request.user)
+        except Task.DoesNotExist:
+            raise Http404('タスクが見つかりません')
+        # テンプレートの category フィルターはカテゴリをORMで読み直すことがあるため、スレッドでレンダリングする
+        return await sync_to_async(render)(request, 'todo/task_detail.html', {'task': task})
+
+    return await _conditional(request, *await sync_to_async(conditional)(), view)
+
+
+def _toggle(user, pk):
+    toggled = Task.objects.toggle_completed(user, [pk])
+    if pk in toggled:
+        tasks_changed(user.pk, toggle_event(toggled))
+    return toggled
+
+
+@query_budget(15)
+@require_POST
+@async_login_required
+async def task_toggle_complete(request, pk):
+    """タスクの完了状態を切り替える（todo.views.task_toggle_complete の非同期版）
+
+    切り替えは UPDATE ... RETURNING と件数の更新を1つのトランザクションで行うため、
+    非同期ORMにはない。そのため、この部分だけ sync_to_async で1回にまとめて実行する。
+
+    Args:
+        request (HttpRequest): HTTPリクエストオブジェクト
+        pk (int): 切り替えるタスクのプライマリーキー
+
+    Returns:
+        JsonResponse: タスクの新しい状態を含むJSON応答
+
+    Raises:
+        Http404: 指定されたタスクが存在しない場合
+    """
+    toggled = await sync_to_async(_toggle)(request.user, pk)
+    if pk not in toggled:
+        raise Http404('タスクが見つかりません')
+    return JsonResponse({
+        'status': 'success',
+        'completed': toggled[pk]
+    })
+
+
+@query_budget(3)
+@async_login_required
+async def task_events(request):
+    """ログインユーザーのタスクの変更を Server-Sent Events で送る
+
+    一覧のページが EventSource で接続し、作成・更新・削除・切り替えを行に反映する。
+    接続の間はイベントループ上で購読のキューを待つだけで、スレッドもデータベースの
+    接続も使わない。WSGIでは応答を送れないため、todo.urls はASGIで動かす場合
+    （settings.TODO_ASYNC_VIEWS）だけこのビューを登録する。
+
+    Args:
+        request (HttpRequest): HTTPリクエストオブジェクト
+
+    Returns:
+        StreamingHttpResponse: text/event-stream のレスポンス
+    """
+    stream = event_stream(request.user.pk, request.headers.get('Last-Event-ID'))
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # リバースプロキシ（nginx）にバッファリングさせない
+    response['X-Accel-Buffering'] = 'no'
+    return response
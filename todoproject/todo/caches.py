@@ -0,0 +1,255 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.crypto import constant_time_compare
+from django.utils.http import urlencode
+from django.utils.safestring import mark_safe
+
+# カテゴリ表の版数（共有キャッシュに置き、プロセスごとのコピーが古いかを判定する）
+CATEGORY_VERSION_KEY = 'todo:category_version'
+
+
+class CategoryCache:
+    """カテゴリ表のプロセス内キャッシュ
+
+    カテゴリはほとんど変更されないため、全件をプロセス内に保持する。
+    Category の保存・削除で版数（タイムスタンプ）を更新し、
+    各プロセスは参照時に版数が変わっていれば読み直す。
+
+    返すCategoryインスタンスは複数のリクエストで共有されるため、変更しないこと。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._categories = ()
+        self._by_id = {}
+
+    def version(self):
+        """現在の版数を返す（キャッシュから消えていれば新しく発行する）"""
+        version = cache.get(CATEGORY_VERSION_KEY)
+        if version is None:
+            cache.add(CATEGORY_VERSION_KEY, time.time_ns(), timeout=None)
+            version = cache.get(CATEGORY_VERSION_KEY)
+        return version
+
+    def _current(self):
+        version = self.version()
+        if version != self._version:
+            from .models import Category
+
+            with self._lock:
+                if version != self._version:
+                    categories = tuple(Category.objects.order_by('pk'))
+                    self._by_id = {category.pk: category for category in categories}
+                    self._categories = categories
+                    self._version = version
+        return self._categories, self._by_id
+
+    def all(self):
+        """全カテゴリを主キー順で返す"""
+        return self._current()[0]
+
+    def get(self, pk):
+        """主キーでカテゴリを返す（存在しない場合は None）"""
+        if pk is None:
+            return None
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            return None
+        return self._current()[1].get(pk)
+
+    def invalidate(self):
+        """版数を更新し、全プロセスのキャッシュを無効にする
+
+        トランザクションのコミット前に他のプロセスが古い内容を読み直すことがあるため、
+        コミット後にもう一度版数を更新する。
+        """
+        self._bump()
+        transaction.on_commit(self._bump)
+
+    def _bump(self):
+        cache.set(CATEGORY_VERSION_KEY, time.time_ns(), timeout=None)
+        with self._lock:
+            self._version = None
+
+
+category_cache = CategoryCache()
+
+
+# タスク一覧の表示内容を決めるGETパラメータ（キャッシュキーに含める）
+TASK_LIST_PARAMS = ('category', 'priority', 'completed', 'archived', 'search', 'sort', 'page', 'cursor')
+
+
+class TaskListCache:
+    """ユーザーごとのタスク一覧（レンダリング済みのテーブル部分）のキャッシュ
+
+    キャッシュキーはユーザー、ユーザーごとの世代番号、カテゴリの版数、
+    正規化したGETパラメータから作る。タスクの作成・更新・削除・切り替えで
+    世代番号を更新すると、そのユーザーの古いエントリは参照されなくなり、
+    タイムアウトで消える。
+
+    ヒット数とミス数はプロセスごとに数える。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'TODO_LIST_CACHE_TIMEOUT', 300)
+
+    @staticmethod
+    def normalize(query_dict):
+        """GETパラメータから一覧の表示に関係するものだけを決まった順で取り出す（空の値は除く）"""
+        return {name: query_dict[name] for name in TASK_LIST_PARAMS if query_dict.get(name)}
+
+    @staticmethod
+    def _generation_key(user_id):
+        return f'todo:task_generation:{user_id}'
+
+    def generation(self, user_id):
+        key = self._generation_key(user_id)
+        generation = cache.get(key)
+        if generation is None:
+            cache.add(key, time.time_ns(), timeout=None)
+            generation = cache.get(key)
+        return generation
+
+    def bump(self, user_id):
+        """ユーザーの世代番号を更新し、そのユーザーのキャッシュをすべて無効にする"""
+        cache.set(self._generation_key(user_id), time.time_ns(), timeout=None)
+
+    def key(self, user_id, params):
+        """キャッシュキーを作る
+
+        一覧を読み込む前にキーを決めておくことで、読み込み中に世代番号が
+        更新された場合は古い内容が古い世代のキーに保存される。
+        """
+        digest = hashlib.sha256(urlencode(params).encode()).hexdigest()[:32]
+        return (
+            f'todo:task_list:{user_id}:{self.generation(user_id)}:'
+            f'{category_cache.version()}:{settings.TODO_PAGINATION}:{digest}'
+        )
+
+    def get(self, key):
+        """キャッシュ済みのHTMLを返す（ない場合、またはキャッシュ無効時は None）"""
+        if not self.timeout:
+            return None
+        html = cache.get(key)
+        with self._lock:
+            if html is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return None if html is None else mark_safe(html)
+
+    def set(self, key, html):
+        if self.timeout:
+            cache.set(key, str(html), timeout=self.timeout)
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+task_list_cache = TaskListCache()
+
+
+class UserCache:
+    """ログインユーザー（request.user）のプロセス内キャッシュ
+
+    セッションに保存されたユーザーIDと認証ハッシュ（パスワードから作られる）が、
+    キャッシュしたユーザーのものと一致すれば auth_user を読まずにそのユーザーを返す。
+    パスワードを変えると認証ハッシュが変わるため、古いセッションは一致せずに通常の検証
+    （django.contrib.auth.get_user。不一致ならセッションを破棄する）に回る。
+
+    ユーザーの保存・削除とログアウトではユーザーごとの版数（共有キャッシュ）を更新し、
+    各プロセスは参照時に版数が変わっていれば読み直す。QuerySet.update などシグナルを
+    送らない変更に備えて、エントリは TODO_USER_CACHE_TIMEOUT 秒で読み直す。
+
+    返すユーザーはキャッシュしたインスタンスのコピー（リクエストごとの変更を共有しない）。
+    """
+
+    def __init__(self, max_entries=10000):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'TODO_USER_CACHE_TIMEOUT', 300)
+
+    @staticmethod
+    def _version_key(user_id):
+        return f'todo:user_version:{user_id}'
+
+    def version(self, user_id):
+        key = self._version_key(user_id)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, time.time_ns(), timeout=None)
+            version = cache.get(key)
+        return version
+
+    def get_user(self, request):
+        """request.user の値を返す（セッションにログイン情報がなければ AnonymousUser）"""
+        from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user
+        from django.contrib.auth.models import AnonymousUser
+
+        session = request.session
+        user_id = session.get(SESSION_KEY)
+        if user_id is None:
+            return AnonymousUser()
+        session_hash = session.get(HASH_SESSION_KEY)
+        backend = session.get(BACKEND_SESSION_KEY)
+        version = self.version(user_id)
+        if self.timeout:
+            with self._lock:
+                entry = self._entries.get(user_id)
+                if entry is not None:
+                    user, user_hash, user_backend, user_version, expires = entry
+                    if (
+                        (user_backend, user_version) == (backend, version)
+                        and time.monotonic() < expires
+                        and constant_time_compare(user_hash, session_hash or '')
+                    ):
+                        self._entries.move_to_end(user_id)
+                        self.hits += 1
+                        return copy.copy(user)
+                self.misses += 1
+
+        user = get_user(request)
+        if self.timeout and user.is_authenticated and session_hash is not None:
+            entry = (user, user.get_session_auth_hash(), backend, version, time.monotonic() + self.timeout)
+            with self._lock:
+                self._entries[user_id] = entry
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            user = copy.copy(user)
+        return user
+
+    def invalidate(self, user_id):
+        """ユーザーのエントリを全プロセスで無効にする"""
+        cache.set(self._version_key(user_id), time.time_ns(), timeout=None)
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+
+user_cache = UserCache()
@@ -0,0 +1,149 @@
+"""
+データベースの接続の設定と、読み込みを複製（レプリカ）へ送るルーター
+
+DATABASE_REPLICA_URL を指定すると settings.DATABASES に複製（settings.TODO_REPLICA_DATABASE）を
+追加する。PrimaryReplicaRouter は書き込みを主（default）へ送り、read_from_replica を付けた
+読み込みだけのビュー（一覧・詳細・エクスポート）のタスクの読み込みを複製へ送る。
+
+複製は主より遅れるため、タスクを書き込んだユーザーは settings.TODO_REPLICA_PIN_SECONDS の間
+主から読む（pin_primary。tasks_changed から呼ばれる）。書き込んだ直後の一覧に変更が反映される。
+
+ローカルでは2つのSQLiteのファイルを主と複製にし、copy_sqlite（sync_replica コマンド）で
+主の内容を複製へコピーする。--lag と --interval で複製の遅れを再現できる。
+"""
+
+import sqlite3
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# 複製から読むモデル。ユーザー・セッションは書き込んだ直後に読むため、カテゴリは
+# プロセス内キャッシュ（todo.caches.CategoryCache）の版数と内容を揃えるため、常に主から読む
+REPLICA_MODELS = ('todo.task', 'todo.archivedtask', 'todo.taskstats', 'todo.taskwatermark')
+
+# 主から読むユーザーを記録するキャッシュのキー
+REPLICA_PIN_KEY = 'todo:replica_pin:{}'
+
+# 実行中のビューの読み込みを送る複製（read_from_replica が設定する）
+_read_alias = ContextVar('todo_read_alias', default=None)
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """SQLiteの接続を開いたときに settings.TODO_SQLITE_PRAGMAS を設定する
+
+    connection_created シグナルで呼ばれる。PRAGMAは接続ごとの設定のため
+    （journal_mode=WAL はデータベースファイルに残る）、接続のたびに実行する。
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'TODO_SQLITE_PRAGMAS', None) or {}
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def replica_alias():
+    """複製のデータベースのエイリアス（複製を設定していない場合は None）"""
+    alias = getattr(settings, 'TODO_REPLICA_DATABASE', None)
+    return alias if alias and alias in connections else None
+
+
+def pin_primary(user_id):
+    """ユーザーの読み込みを settings.TODO_REPLICA_PIN_SECONDS の間、主へ送る
+
+    複製にまだ届いていない書き込みを、書き込んだユーザー自身が読めるようにする。
+    複数のプロセスで動かす場合は CACHES を共有のキャッシュにする。
+    """
+    if replica_alias() is not None:
+        cache.set(REPLICA_PIN_KEY.format(user_id), True, settings.TODO_REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    """ユーザーの読み込みを主へ送っている間か"""
+    return cache.get(REPLICA_PIN_KEY.format(user_id)) is not None
+
+
+def read_from_replica(view_func):
+    """読み込みだけのビューで、タスクの読み込みを複製へ送る（同期・非同期のビューの両方に使える）
+
+    login_required の内側に置く。ログインユーザーが主へ固定されている間（pin_primary）や、
+    複製を設定していない場合は主から読む。複製から読んだ値をもとに書き込まないこと。
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            alias = replica_alias()
+            if alias is not None and await cache.aget(REPLICA_PIN_KEY.format(request.user.pk)) is not None:
+                alias = None
+            token = _read_alias.set(alias)
+            try:
+                return await view_func(request, *args, **kwargs)
+            finally:
+                _read_alias.reset(token)
+        return wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        alias = replica_alias()
+        if alias is not None and is_pinned(request.user.pk):
+            alias = None
+        token = _read_alias.set(alias)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _read_alias.reset(token)
+    return wrapper
+
+
+def copy_sqlite(source, target, lag=0):
+    """SQLiteのデータベースの内容を丸ごと別のデータベースへコピーする（オンラインバックアップ）
+
+    主の内容をメモリー上に写してから lag 秒待って複製へ書き込むため、書き込んだ時点で
+    複製は lag 秒前の主の内容になる（レプリケーションの遅れの再現）。
+
+    Args:
+        source (sqlite3.Connection): 主の接続
+        target (sqlite3.Connection): 複製の接続
+        lag (float): 主を読んでから複製へ書き込むまでの秒数
+    """
+    snapshot = sqlite3.connect(':memory:')
+    try:
+        source.backup(snapshot)
+        if lag > 0:
+            time.sleep(lag)
+        snapshot.backup(target)
+    finally:
+        snapshot.close()
+
+
+class PrimaryReplicaRouter:
+    """書き込みを主へ、read_from_replica のビューでのタスクの読み込みを複製へ送るルーター
+
+    複製は主のコピーのため、マイグレーションは主だけに行い、主と複製のオブジェクトの
+    間のリレーションを許す。
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is not None and model._meta.label_lower in REPLICA_MODELS:
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        # 複製から読んだインスタンスを保存する場合も主へ書き込む
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == replica_alias():
+            return False
+        return None
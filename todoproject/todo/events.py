@@ -0,0 +1,240 @@
+"""
+タスクの変更のリアルタイム配信（Server-Sent Events）
+
+タスクの作成・更新・削除・完了状態の切り替えを、同じユーザーが開いている
+ほかのタブや端末のタスク一覧へ送る。一覧のページは /events/ に EventSource で
+接続し、受け取った変更を行に反映する（ページを読み直さない）。
+
+変更は tasks_changed（todo.signals）からブローカーへ publish し、ブローカーが
+そのユーザーを購読している接続へ配る。ブローカーは settings.TODO_EVENT_BROKER の
+クラスで差し替えられる。ブローカーは次の3つを持つクラス:
+
+- publish(user_id, event): 変更を配る（どのスレッドからも呼べること）
+- subscribe(user_id): 購読を表す非同期コンテキストマネージャ。
+  購読は await get(timeout) で次の変更を返す（timeout 秒の間になければ None）
+- last_event_id(user_id): そのユーザーに最後に配った変更のID（ない場合は None）。
+  再接続したブラウザが切断中の変更を取りこぼしたかの判定に使う
+
+既定の InMemoryBroker はプロセス内だけで配るため、複数のプロセスで動かす場合は
+プロセスをまたぐブローカー（Redis の pub/sub など）に差し替える。
+
+接続ごとにスレッドを使わないよう、配信のビュー（todo.async_views.task_events）は
+イベントループ上で購読のキューを待つ。ASGI（todoproject/asgi.py）で動かすこと。
+"""
+
+import asyncio
+import itertools
+import json
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .caches import category_cache
+
+# 変更の種類。reload は内容の分からない変更（インポートなど）で、一覧を読み直す必要がある
+EVENT_TYPES = ('create', 'update', 'delete', 'toggle', 'reload')
+
+# 1つの接続で配りきれずに溜めておく変更の上限（超えたら reload を1件だけ送る）
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# 接続が閉じた後にブラウザが再接続するまでの時間（ミリ秒）
+EVENT_RETRY_MS = 3000
+
+# 変更で送るタスクの列
+EVENT_TASK_FIELDS = ('title', 'due_date', 'completed', 'priority', 'category_id')
+
+
+class Subscription:
+    """1つの接続の購読（変更のキュー）
+
+    publish は別のスレッドから呼ばれるため、キューへの追加は購読したイベントループで行う。
+    キューがいっぱいになった（接続が読むのが遅い）場合は、溜まった変更を捨てて reload を送る。
+
+    Args:
+        loop (AbstractEventLoop): 購読したイベントループ
+        maxsize (int): 溜めておく変更の上限
+    """
+
+    def __init__(self, loop, maxsize=SUBSCRIBER_QUEUE_SIZE):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def put(self, event):
+        """変更をキューに入れる（どのスレッドからも呼べる）"""
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        if self.queue.full():
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = {'id': event['id'], 'type': 'reload'}
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        """次の変更を返す（timeout 秒の間になければ None）"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InMemoryBroker:
+    """プロセス内で変更を配るブローカー（既定）
+
+    ユーザーごとに購読の集合を持ち、publish で各購読のキューへ入れる。
+    購読はキューを1つ持つだけで、スレッドやタイマーは使わない。
+    """
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._last_ids = {}
+        self.published = 0
+
+    def publish(self, user_id, event):
+        event = {'id': next(self._ids), **event}
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+            self._last_ids[user_id] = event['id']
+            self.published += 1
+        for subscription in subscriptions:
+            try:
+                subscription.put(event)
+            except RuntimeError:
+                # イベントループが閉じられた接続
+                self._remove(user_id, subscription)
+
+    @asynccontextmanager
+    async def subscribe(self, user_id):
+        subscription = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        try:
+            yield subscription
+        finally:
+            self._remove(user_id, subscription)
+
+    def last_event_id(self, user_id):
+        return self._last_ids.get(user_id)
+
+    def _remove(self, user_id, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[user_id]
+
+    def stats(self):
+        """購読中の接続数・ユーザー数、配った変更の数、購読中の接続で捨てた変更の数"""
+        with self._lock:
+            return {
+                'connections': sum(len(s) for s in self._subscriptions.values()),
+                'users': len(self._subscriptions),
+                'published': self.published,
+                'dropped': sum(sub.dropped for s in self._subscriptions.values() for sub in s),
+            }
+
+
+@lru_cache
+def _load_broker(path):
+    return import_string(path)()
+
+
+def get_broker():
+    """settings.TODO_EVENT_BROKER のブローカー（プロセスで1つ）"""
+    return _load_broker(settings.TODO_EVENT_BROKER)
+
+
+def task_payload(pk, values):
+    """変更で送るタスクの値（一覧の行の表示に使う形にする）
+
+    Args:
+        pk (int): タスクのプライマリーキー
+        values (dict): 列名（EVENT_TASK_FIELDS）と値。変更した列だけでもよい
+
+    Returns:
+        dict: JSONにできるタスクの値（期限は表示用の文字列、カテゴリは名前と色も含める）
+    """
+    task = {'id': pk}
+    for name in EVENT_TASK_FIELDS:
+        if name not in values:
+            continue
+        value = values[name]
+        if name == 'due_date':
+            task['due_date'] = value.isoformat() if value else None
+            task['due_date_display'] = f'{timezone.localtime(value):%Y-%m-%d %H:%M}' if value else ''
+        elif name == 'category_id':
+            category = category_cache.get(value)
+            task['category'] = {
+                'id': category.pk, 'name': str(category), 'color': category.color,
+            } if category is not None else None
+        else:
+            task[name] = value
+    return task
+
+
+def instance_payload(task):
+    """Task のインスタンスから task_payload を作る（読み込んでいない列は含めない）"""
+    deferred = task.get_deferred_fields()
+    return task_payload(task.pk, {name: getattr(task, name) for name in EVENT_TASK_FIELDS if name not in deferred})
+
+
+def toggle_event(changed):
+    """完了状態の切り替えの変更（changed は toggle_completed / complete の結果）"""
+    return {'type': 'toggle', 'tasks': [{'id': pk, 'completed': completed} for pk, completed in changed.items()]}
+
+
+def publish(user_id, event):
+    """ユーザーのタスクの変更を配る（トランザクション中ならコミットした後に配る）
+
+    Args:
+        user_id (int): タスクの所有者のユーザーID
+        event (dict): {'type': EVENT_TYPES のいずれか, ...}
+    """
+    broker = get_broker()
+    transaction.on_commit(lambda: broker.publish(user_id, event))
+
+
+def format_event(event):
+    """変更を Server-Sent Events の1件にする（id は再接続時に Last-Event-ID で送られる）"""
+    data = json.dumps({key: value for key, value in event.items() if key != 'id'}, ensure_ascii=False)
+    if 'id' not in event:
+        return f'data: {data}\n\n'
+    return f'id: {event["id"]}\ndata: {data}\n\n'
+
+
+async def event_stream(user_id, last_event_id=None, keepalive=None, timeout=None):
+    """ユーザーのタスクの変更を Server-Sent Events の文字列として返す非同期ジェネレーター
+
+    変更がない間は keepalive 秒ごとにコメントを送り、プロキシに接続を切られないようにする。
+    timeout 秒が過ぎたら終わる（ブラウザは retry のミリ秒後に Last-Event-ID を付けて再接続する）。
+
+    Args:
+        user_id (int): ログインユーザーのID
+        last_event_id (str): 再接続したブラウザが最後に受け取った変更のID
+        keepalive (float): コメントを送る間隔（秒。省略時は settings.TODO_EVENT_KEEPALIVE）
+        timeout (float): 接続を閉じるまでの秒数（省略時は settings.TODO_EVENT_STREAM_TIMEOUT）
+    """
+    keepalive = keepalive or settings.TODO_EVENT_KEEPALIVE
+    timeout = timeout or settings.TODO_EVENT_STREAM_TIMEOUT
+    broker = get_broker()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    async with broker.subscribe(user_id) as subscription:
+        yield f'retry: {EVENT_RETRY_MS}\n\n'
+        # 購読を始めた後に比べ、切断中に変更があった場合は一覧を読み直させる（変更の履歴は残していない）
+        if last_event_id and str(broker.last_event_id(user_id)) != last_event_id:
+            yield format_event({'type': 'reload'})
+        while (remaining := deadline - loop.time()) > 0:
+            event = await subscription.get(min(keepalive, remaining))
+            yield ': keepalive\n\n' if event is None else format_event(event)
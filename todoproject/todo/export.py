@@ -0,0 +1,106 @@
+import csv
+import datetime
+import io
+import json
+
+from .caches import category_cache
+
+# エクスポートする列（categoryはカテゴリ名に置き換える）
+EXPORT_FIELDS = (
+    'id',
+    'title',
+    'description',
+    'due_date',
+    'completed',
+    'priority',
+    'category',
+    'created_date',
+    'updated_at',
+)
+
+# 形式ごとのContent-Typeと拡張子
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson; charset=utf-8', 'ndjson'),
+}
+
+# データベースから1回に読み込む行数（この行数ごとにレスポンスへ書き出す）
+EXPORT_CHUNK_SIZE = 2000
+
+
+def _format_value(value):
+    # 日時はマイクロ秒まで残したISO 8601にする（インポートで元の値に戻せるように）
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+def export_records(tasks, chunk_size=EXPORT_CHUNK_SIZE):
+    """タスクを1件ずつ辞書として返す
+
+    モデルインスタンスは作らず、values_list をサーバー側のチャンク単位で
+    読み込むため、件数が多くてもメモリ使用量は一定。
+
+    Args:
+        tasks (QuerySet): フィルタリング・ソート済みのタスククエリセット
+        chunk_size (int): データベースから1回に読み込む行数
+
+    Yields:
+        dict: EXPORT_FIELDS をキーにした1件分の値
+    """
+    # カテゴリ名は最初に1回だけ引いておく
+    category_names = {category.pk: str(category) for category in category_cache.all()}
+    for row in tasks.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size):
+        record = {name: _format_value(value) for name, value in zip(EXPORT_FIELDS, row)}
+        record['category'] = category_names.get(record['category'], '')
+        yield record
+
+
+def _chunked(lines, chunk_size):
+    # 1行ずつではなく chunk_size 行ごとにまとめて送る
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _csv_lines(records):
+    output = io.StringIO()
+    writer = csv.writer(output)
+
+    def line(values):
+        writer.writerow(values)
+        value = output.getvalue()
+        output.seek(0)
+        output.truncate()
+        return value
+
+    # Excelで開いたときに文字化けしないようBOMを付ける
+    yield '\ufeff' + line(EXPORT_FIELDS)
+    for record in records:
+        yield line(['' if record[name] is None else record[name] for name in EXPORT_FIELDS])
+
+
+def _ndjson_lines(records):
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def stream_tasks(tasks, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """タスクをCSVまたはJSON Lines形式の文字列の塊として返す
+
+    Args:
+        tasks (QuerySet): フィルタリング・ソート済みのタスククエリセット
+        export_format (str): 'csv' または 'ndjson'
+        chunk_size (int): データベースから1回に読み込む行数
+
+    Returns:
+        Iterator[str]: chunk_size 行ずつまとめた出力
+    """
+    records = export_records(tasks, chunk_size)
+    lines = _csv_lines(records) if export_format == 'csv' else _ndjson_lines(records)
+    return _chunked(lines, chunk_size)
@@ -0,0 +1,51 @@
+from django.core import exceptions
+from django.db import models
+
+# 優先度の値と、データベースに保存する順位（大きいほど優先度が高い）
+PRIORITY_RANKS = {
+    'low': 1,
+    'medium': 2,
+    'high': 3,
+}
+PRIORITY_VALUES = {rank: value for value, rank in PRIORITY_RANKS.items()}
+
+
+class PriorityField(models.PositiveSmallIntegerField):
+    """優先度を順位の整数で保存するフィールド
+
+    Python側では従来どおり 'low' / 'medium' / 'high' の文字列として扱い、
+    データベースには 1 / 2 / 3 を保存する。文字列の比較ではなく順位で
+    並び替え・範囲検索ができ、(user, priority) のインデックスで並び替えられる。
+    """
+
+    description = '優先度（順位の整数で保存）'
+
+    @property
+    def validators(self):
+        # 値は文字列のため、整数の範囲チェックは行わない
+        return list(self._validators)
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return PRIORITY_VALUES.get(value, value)
+
+    def to_python(self, value):
+        if value is None or value in PRIORITY_RANKS:
+            return value
+        try:
+            return PRIORITY_VALUES[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise exceptions.ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        if value is None:
+            return value
+        if value in PRIORITY_RANKS:
+            return PRIORITY_RANKS[value]
+        return super().get_prep_value(value)
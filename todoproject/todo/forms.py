@@ -1,12 +1,55 @@
 from django import forms
+from django.core.exceptions import ValidationError
+from django.forms.models import ModelChoiceIterator
+
+from .caches import category_cache
 from .models import Task, Category
 
+
+class CachedCategoryIterator(ModelChoiceIterator):
+    """クエリセットの代わりにカテゴリキャッシュから選択肢を作る"""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for category in category_cache.all():
+            yield self.choice(category)
+
+    def __len__(self):
+        return len(category_cache.all()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(category_cache.all())
+
+
+class CachedCategoryChoiceField(forms.ModelChoiceField):
+    """カテゴリキャッシュで選択肢の表示と入力値の検証を行う ModelChoiceField
+
+    フォームの生成・検証でカテゴリのクエリを発行しない。
+    """
+    iterator = CachedCategoryIterator
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        if isinstance(value, Category):
+            value = value.pk
+        category = category_cache.get(value)
+        if category is None:
+            raise ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+        return category
+
+
 class TaskForm(forms.ModelForm):
     """タスク作成・編集用のフォーム
 
     タスクモデルに基づいて、ユーザーがタスクを作成・編集するためのフォームを提供する
     """
-    category = forms.ModelChoiceField(
+    category = CachedCategoryChoiceField(
         queryset=Category.objects.all(),
         empty_label="カテゴリを選択",
         required=False,
@@ -24,4 +67,23 @@ class TaskForm(forms.ModelForm):
         }
         widgets = {
             'due_date': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
-        }
\ No newline at end of file
+        }
+
+    def save(self, commit=True):
+        """タスクを保存する
+
+        既存のタスクでは、入力で値が変わった列（と更新日時）だけをUPDATEする。
+        何も変わっていなければ保存しない（説明などの大きな列を毎回書き直さない）。
+        """
+        if not commit or self.instance._state.adding:
+            return super().save(commit)
+        task = super().save(commit=False)
+        if self.changed_data:
+            task.save(update_fields=[*self.changed_data, 'updated_at'])
+        return task
+
+    def _get_validation_exclusions(self):
+        exclude = super()._get_validation_exclusions()
+        # カテゴリの存在はカテゴリキャッシュで検証済みのため、モデル検証でのクエリを省く
+        exclude.add('category')
+        return exclude
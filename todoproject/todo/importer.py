@@ -0,0 +1,218 @@
+import csv
+import io
+import json
+import time
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .caches import category_cache
+from .forms import TaskForm
+from .models import Task
+from .signals import tasks_changed
+from .stats import record_changes
+
+# インポートできる形式（エクスポートと同じ）
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+# 1回の bulk_create（1トランザクション）で保存する件数
+IMPORT_BATCH_SIZE = 1000
+
+# 完了状態として受け付ける文字列
+TRUE_VALUES = ('true', '1', 'yes', '完了')
+FALSE_VALUES = ('false', '0', 'no', '未完了', '')
+
+
+class ImportResult:
+    """インポートの結果
+
+    Attributes:
+        created: 保存したタスク数
+        errors: (行番号, {列名: [エラーメッセージ]}) のリスト
+        elapsed: かかった秒数
+    """
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    @property
+    def rows(self):
+        return self.created + len(self.errors)
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self, max_errors=None):
+        errors = self.errors if max_errors is None else self.errors[:max_errors]
+        return {
+            'created': self.created,
+            'failed': len(self.errors),
+            'elapsed': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+            'errors': [{'line': line, 'errors': messages} for line, messages in errors],
+        }
+
+
+def guess_format(filename):
+    """ファイル名の拡張子から形式を決める（不明な場合は None）"""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension in ('ndjson', 'jsonl'):
+        return 'ndjson'
+    if extension == 'csv':
+        return 'csv'
+    return None
+
+
+def read_records(stream, import_format):
+    """テキストストリームから1件ずつ (行番号, 辞書) を返す
+
+    全体を読み込まずに1行ずつ処理する。JSONとして読めない行は
+    (行番号, ValidationError) として返す。
+
+    Args:
+        stream (TextIO): CSVまたはJSON Linesのテキストストリーム
+        import_format (str): 'csv' または 'ndjson'
+
+    Yields:
+        tuple: (行番号, dict または ValidationError)
+    """
+    if import_format == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            # 複数行にまたがる値があるため、行番号はリーダーから取る
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError
+        except ValueError:
+            yield line_number, ValidationError('JSONのオブジェクトとして読み込めません')
+        else:
+            yield line_number, record
+
+
+class TaskImporter:
+    """CSV / JSON Lines のタスクを検証し、まとめて保存する
+
+    各行は TaskForm のフィールドで検証する（モデルフォームを行ごとに作らず、
+    フィールドの clean だけを使う）。カテゴリは最初に作った名前の表で引くため、
+    検証中にクエリは発行しない。検証を通った行は batch_size 件ごとに
+    1トランザクションの bulk_create で保存する。
+
+    bulk_create は post_save を送らないため、最後に tasks_changed を1回呼ぶ。
+
+    Args:
+        user (User): インポートしたタスクの所有者
+        batch_size (int): 1回の bulk_create で保存する件数
+    """
+
+    fields = TaskForm.base_fields
+
+    def __init__(self, user, batch_size=IMPORT_BATCH_SIZE):
+        self.user = user
+        self.batch_size = max(1, int(batch_size))
+        # カテゴリ名（表示名とシステム用の名前）→ 主キー
+        self.category_ids = {}
+        for category in category_cache.all():
+            self.category_ids.setdefault(category.name, category.pk)
+            self.category_ids.setdefault(str(category), category.pk)
+
+    def _value(self, record, name):
+        value = record.get(name)
+        if value is None or value == '':
+            field = Task._meta.get_field(name)
+            return field.get_default() if field.has_default() else ''
+        return value
+
+    def build(self, record):
+        """1件分の値を検証してタスクを作る（保存はしない）
+
+        Raises:
+            ValidationError: 値が不正な場合（error_dict に列ごとのエラー）
+        """
+        cleaned = {}
+        errors = {}
+        for name, field in self.fields.items():
+            value = self._value(record, name)
+            if name == 'category' and value != '':
+                value = self.category_ids.get(str(value), value)
+            try:
+                cleaned[name] = field.clean(value)
+            except ValidationError as e:
+                errors[name] = e.messages
+
+        completed = str(record.get('completed') or '').strip().lower()
+        if completed in TRUE_VALUES:
+            cleaned['completed'] = True
+        elif completed in FALSE_VALUES:
+            cleaned['completed'] = False
+        else:
+            errors['completed'] = [f'完了状態として解釈できません: {completed}']
+
+        if errors:
+            raise ValidationError(errors)
+        return Task(user=self.user, **cleaned)
+
+    def _save(self, batch, result):
+        with transaction.atomic():
+            Task.objects.bulk_create(batch)
+            # bulk_create はシグナルを送らないため、件数はここで反映する
+            record_changes(self.user.pk, [(None, task.state()) for task in batch])
+        result.created += len(batch)
+
+    def run(self, records):
+        """read_records の結果を検証・保存する
+
+        Returns:
+            ImportResult: 保存件数、行ごとのエラー、処理時間
+        """
+        result = ImportResult()
+        start = time.perf_counter()
+        batch = []
+        for line_number, record in records:
+            if isinstance(record, ValidationError):
+                result.errors.append((line_number, {'__all__': record.messages}))
+                continue
+            try:
+                batch.append(self.build(record))
+            except ValidationError as e:
+                result.errors.append((line_number, e.message_dict))
+                continue
+            if len(batch) >= self.batch_size:
+                self._save(batch, result)
+                batch = []
+        if batch:
+            self._save(batch, result)
+        result.elapsed = time.perf_counter() - start
+
+        if result.created:
+            tasks_changed(self.user.pk)
+        return result
+
+
+def import_tasks(user, stream, import_format, batch_size=IMPORT_BATCH_SIZE):
+    """ストリームからタスクをインポートする
+
+    Args:
+        user (User): インポートしたタスクの所有者
+        stream (TextIO | BinaryIO): CSVまたはJSON Linesのストリーム（バイナリはUTF-8として読む）
+        import_format (str): 'csv' または 'ndjson'
+        batch_size (int): 1回の bulk_create で保存する件数
+
+    Returns:
+        ImportResult: インポートの結果
+    """
+    if import_format not in IMPORT_FORMATS:
+        raise ValueError(f'未対応の形式です: {import_format}')
+    if not isinstance(stream, io.TextIOBase):
+        # BOM付きのUTF-8（エクスポートしたCSV）も読めるようにする
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    importer = TaskImporter(user, batch_size)
+    return importer.run(read_records(stream, import_format))
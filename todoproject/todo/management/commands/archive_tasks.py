@@ -0,0 +1,40 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from todo.archive import ARCHIVE_BATCH_SIZE, archivable, archive_tasks
+from todo.models import ArchivedTask, Task
+
+
+class Command(BaseCommand):
+    help = '最終更新から一定の期間が過ぎた完了済みのタスクを、全ユーザー分アーカイブ（ArchivedTask）へ移す'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=float, default=settings.TODO_ARCHIVE_AFTER_DAYS,
+            help='完了してから（最終更新から）アーカイブするまでの日数（省略時は settings.TODO_ARCHIVE_AFTER_DAYS）',
+        )
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, help='1バッチで移すタスク数')
+        parser.add_argument('--time-budget', type=float, help='処理時間の上限（秒）。超えたらバッチの区切りで止める')
+        parser.add_argument('--dry-run', action='store_true', help='移さずに、移す件数だけを数える')
+
+    def handle(self, *args, **options):
+        if options['older_than_days'] < 0:
+            raise CommandError('--older-than-days は0以上を指定してください')
+        older_than = datetime.timedelta(days=options['older_than_days'])
+
+        if options['dry_run']:
+            count = archivable(older_than).count()
+            self.stdout.write(f'{count}件のタスクをアーカイブする予定です（タスク表 {Task.objects.count()}件）')
+            return
+
+        result = archive_tasks(older_than, options['batch_size'], options['time_budget'])
+        rate = result.archived / result.elapsed if result.elapsed else 0
+        self.stdout.write(
+            f'{result.users}人のユーザーの{result.archived}件のタスクを{result.batches}バッチでアーカイブしました'
+            f'（{result.elapsed:.1f}秒、{rate:.0f}件/秒）'
+        )
+        self.stdout.write(f'タスク表 {Task.objects.count()}件、アーカイブ {ArchivedTask.objects.count()}件')
+        if not result.finished:
+            self.stdout.write(self.style.WARNING('処理時間の上限に達したため途中で止めました（次回の実行で続きを処理します）'))
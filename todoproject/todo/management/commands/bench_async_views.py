@@ -0,0 +1,160 @@
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+
+from todo.models import Task
+from todo.seeding import delete_users
+from todo.stats import rebuild
+
+
+class Command(BaseCommand):
+    help = 'ASGIのテストクライアントで同時にリクエストを送り、同期版と非同期版のタスクのビューを比べる'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=20, help='同時に送るリクエスト数')
+        parser.add_argument('--seconds', type=float, default=10, help='計測する秒数')
+        parser.add_argument('--write-ratio', type=float, default=0.1, help='完了状態の切り替えの割合')
+        parser.add_argument('--detail-ratio', type=float, default=0.3, help='タスク詳細の割合（残りは一覧）')
+        parser.add_argument('--tasks', type=int, default=2000, help='投入するタスク数')
+        parser.add_argument('--username', default='bench_async')
+        parser.add_argument(
+            '--compare', action='store_true',
+            help='同期版（TODO_ASYNC_VIEWS=0）と非同期版（TODO_ASYNC_VIEWS=1）をそれぞれ別プロセスで計測して比べる',
+        )
+        parser.add_argument('--json', action='store_true', help='結果をJSONで出力する')
+        parser.add_argument('--keep', action='store_true', help='計測後に投入したタスクを残す')
+
+    def handle(self, *args, **options):
+        user = self.seed(options['username'], options['tasks'])
+        try:
+            if options['compare']:
+                self.compare(options)
+            else:
+                # テストクライアントのホスト名（testserver）を受け付ける
+                with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                    result = asyncio.run(self.run(user, options))
+                if options['json']:
+                    self.stdout.write(json.dumps(result))
+                else:
+                    self.write_table([result])
+        finally:
+            if not options['keep'] and not options['json']:
+                delete_users(User.objects.filter(pk=user.pk))
+
+    def seed(self, username, count):
+        user, _ = User.objects.get_or_create(username=username)
+        existing = Task.objects.filter(user=user).count()
+        if existing < count:
+            rng = random.Random(0)
+            with transaction.atomic():
+                Task.objects.bulk_create(
+                    [
+                        Task(
+                            title=f'Bench task {i}',
+                            priority=rng.choice(['low', 'medium', 'high']),
+                            completed=rng.random() < 0.3,
+                            user=user,
+                        )
+                        for i in range(existing, count)
+                    ],
+                    batch_size=1000,
+                )
+                rebuild(user.pk)
+        return user
+
+    def compare(self, options):
+        connection.close()
+        results = []
+        for async_views in ('0', '1'):
+            # 一覧のキャッシュを無効にし、毎回ビューの処理を通す
+            env = {**os.environ, 'TODO_ASYNC_VIEWS': async_views, 'TODO_LIST_CACHE_TIMEOUT': '0'}
+            command = [
+                sys.executable, sys.argv[0], 'bench_async_views', '--json',
+                '--concurrency', str(options['concurrency']),
+                '--seconds', str(options['seconds']),
+                '--write-ratio', str(options['write_ratio']),
+                '--detail-ratio', str(options['detail_ratio']),
+                '--tasks', str(options['tasks']),
+                '--username', options['username'],
+            ]
+            output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+        self.write_table(results)
+
+    async def run(self, user, options):
+        task_ids = await sync_to_async(
+            lambda: list(Task.objects.filter(user=user).values_list('pk', flat=True))
+        )()
+        client = AsyncClient()
+        await client.aforce_login(user)
+        await client.get(reverse('task_list'))
+
+        deadline = time.perf_counter() + options['seconds']
+        timings = {'list': [], 'detail': [], 'toggle': []}
+        errors = 0
+
+        async def worker(seed):
+            nonlocal errors
+            rng = random.Random(seed)
+            while time.perf_counter() < deadline:
+                choice = rng.random()
+                if choice < options['write_ratio']:
+                    kind = 'toggle'
+                    request = client.post(reverse('task_toggle_complete', args=[rng.choice(task_ids)]))
+                elif choice < options['write_ratio'] + options['detail_ratio']:
+                    kind = 'detail'
+                    request = client.get(reverse('task_detail', args=[rng.choice(task_ids)]))
+                else:
+                    kind = 'list'
+                    request = client.get(reverse('task_list'), {'sort': rng.choice(['-created_date', 'priority'])})
+                start = time.perf_counter()
+                response = await request
+                if response.status_code == 200:
+                    timings[kind].append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(options['concurrency'])))
+        elapsed = time.perf_counter() - started
+
+        durations = [t for values in timings.values() for t in values]
+        return {
+            'views': 'async' if settings.TODO_ASYNC_VIEWS else 'sync',
+            'requests_per_second': len(durations) / elapsed,
+            'errors': errors,
+            'p50_ms': self.percentile(durations, 50) * 1000,
+            'p95_ms': self.percentile(durations, 95) * 1000,
+            **{f'{kind}_p95_ms': self.percentile(values, 95) * 1000 for kind, values in timings.items()},
+        }
+
+    @staticmethod
+    def percentile(values, percent):
+        if len(values) < 2:
+            return values[0] if values else 0.0
+        return statistics.quantiles(values, n=100)[percent - 1]
+
+    def write_table(self, results):
+        self.stdout.write(
+            f"{'views':<8}{'req/s':>8}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}"
+            f"{'list p95':>10}{'detail p95':>12}{'toggle p95':>12}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['views']:<8}{result['requests_per_second']:>8.0f}{result['errors']:>8}"
+                f"{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['list_p95_ms']:>10.1f}"
+                f"{result['detail_p95_ms']:>12.1f}{result['toggle_p95_ms']:>12.1f}"
+            )
@@ -0,0 +1,160 @@
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection, connections, transaction
+
+from todo.models import Task
+from todo.seeding import delete_users
+from todo.signals import tasks_changed
+from todo.stats import rebuild
+from todo.views import TASK_LIST_FIELDS
+
+
+class Command(BaseCommand):
+    help = '読み込みと書き込みが混在する負荷で、データベースの設定（DATABASE_PROFILE）ごとのスループットを測る'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='同時に処理するスレッド数（ワーカー数の代わり）')
+        parser.add_argument('--seconds', type=float, default=10, help='計測する秒数')
+        parser.add_argument('--write-ratio', type=float, default=0.2, help='書き込み（完了状態の切り替え）の割合')
+        parser.add_argument('--tasks', type=int, default=5000, help='投入するタスク数')
+        parser.add_argument('--username', default='bench_db')
+        parser.add_argument(
+            '--compare', action='store_true',
+            help='development と production のプロファイルをそれぞれ別プロセスで計測して比べる',
+        )
+        parser.add_argument('--json', action='store_true', help='結果をJSONで出力する')
+        parser.add_argument('--keep', action='store_true', help='計測後に投入したタスクを残す')
+
+    def handle(self, *args, **options):
+        user = self.seed(options['username'], options['tasks'])
+        try:
+            if options['compare']:
+                self.compare(options)
+            else:
+                result = self.run(user, options)
+                if options['json']:
+                    self.stdout.write(json.dumps(result))
+                else:
+                    self.write_table([result])
+        finally:
+            if not options['keep'] and not options['json']:
+                delete_users(User.objects.filter(pk=user.pk))
+
+    def seed(self, username, count):
+        user, _ = User.objects.get_or_create(username=username)
+        existing = Task.objects.filter(user=user).count()
+        if existing < count:
+            rng = random.Random(0)
+            with transaction.atomic():
+                Task.objects.bulk_create(
+                    [
+                        Task(
+                            title=f'Bench task {i}',
+                            priority=rng.choice(['low', 'medium', 'high']),
+                            completed=rng.random() < 0.3,
+                            user=user,
+                        )
+                        for i in range(existing, count)
+                    ],
+                    batch_size=1000,
+                )
+                rebuild(user.pk)
+        return user
+
+    def compare(self, options):
+        # 子プロセスがジャーナルモードを切り替えられるよう、この接続は閉じておく
+        connection.close()
+        results = []
+        for profile in ('development', 'production'):
+            env = {**os.environ, 'DATABASE_PROFILE': profile}
+            command = [
+                sys.executable, sys.argv[0], 'bench_db', '--json',
+                '--threads', str(options['threads']),
+                '--seconds', str(options['seconds']),
+                '--write-ratio', str(options['write_ratio']),
+                '--tasks', str(options['tasks']),
+                '--username', options['username'],
+            ]
+            output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+        self.write_table(results)
+
+    def run(self, user, options):
+        if connection.vendor == 'sqlite' and not settings.TODO_SQLITE_PRAGMAS:
+            # WALはデータベースファイルに残るため、既定のジャーナルに戻してから測る
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode = DELETE')
+
+        task_ids = list(Task.objects.filter(user=user).values_list('pk', flat=True))
+        connection.close()
+        deadline = time.perf_counter() + options['seconds']
+        results = []
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            reads, writes, errors = [], [], 0
+            while time.perf_counter() < deadline:
+                write = rng.random() < options['write_ratio']
+                start = time.perf_counter()
+                try:
+                    if write:
+                        Task.objects.toggle_completed(user, [rng.choice(task_ids)])
+                        tasks_changed(user.pk)
+                    else:
+                        tasks = Task.objects.filter(user=user, completed=False).only(*TASK_LIST_FIELDS)
+                        list(tasks.order_by('-created_date', '-pk')[:11])
+                except OperationalError:
+                    errors += 1
+                else:
+                    (writes if write else reads).append(time.perf_counter() - start)
+                finally:
+                    # リクエストの終わりと同じく、CONN_MAX_AGE を過ぎた接続を閉じる
+                    close_old_connections()
+            connections.close_all()
+            with lock:
+                results.append((reads, writes, errors))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        reads = [t for r, _, _ in results for t in r]
+        writes = [t for _, w, _ in results for t in w]
+        return {
+            'profile': settings.DATABASE_PROFILE,
+            'vendor': connection.vendor,
+            'reads_per_second': len(reads) / options['seconds'],
+            'writes_per_second': len(writes) / options['seconds'],
+            'errors': sum(e for _, _, e in results),
+            'read_p95_ms': self.percentile(reads, 95) * 1000,
+            'write_p95_ms': self.percentile(writes, 95) * 1000,
+        }
+
+    @staticmethod
+    def percentile(values, percent):
+        if len(values) < 2:
+            return values[0] if values else 0.0
+        return statistics.quantiles(values, n=100)[percent - 1]
+
+    def write_table(self, results):
+        self.stdout.write(
+            f"{'profile':<14}{'reads/s':>10}{'writes/s':>10}{'errors':>8}{'read p95 ms':>13}{'write p95 ms':>14}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['profile']:<14}{result['reads_per_second']:>10.0f}{result['writes_per_second']:>10.0f}"
+                f"{result['errors']:>8}{result['read_p95_ms']:>13.1f}{result['write_p95_ms']:>14.1f}"
+            )
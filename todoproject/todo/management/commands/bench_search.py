@@ -0,0 +1,71 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from todo.models import Task
+from todo.search import search_tasks, uses_index
+from todo.seeding import delete_users, random_text
+
+QUERIES = ['打ち合わせ', '議事録', '報告書の', 'invoice', 'customer', 'deploy backup', 'zzz-not-found']
+
+
+class Command(BaseCommand):
+    help = '部分一致（LIKE）と全文検索インデックスの検索速度を比較する'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1_000_000, help='投入するタスク数')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5, help='1クエリあたりの計測回数')
+        parser.add_argument('--username', default='bench_search')
+        parser.add_argument('--keep', action='store_true', help='計測後に投入したタスクを残す')
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username=options['username'])
+        existing = Task.objects.filter(user=user).count()
+        if existing < options['tasks']:
+            self.seed(user, options['tasks'] - existing, options['batch_size'])
+
+        tasks = Task.objects.filter(user=user).order_by('-created_date', '-pk')
+        self.stdout.write(f"{'query':<16}{'backend':<8}{'count ms':>10}{'page ms':>10}{'hits':>10}")
+        for query in QUERIES:
+            like = tasks.filter(Q(title__icontains=query) | Q(description__icontains=query))
+            backends = [('like', like)]
+            if uses_index(query):
+                backends.append(('fts', search_tasks(tasks, query)))
+            for name, queryset in backends:
+                count_ms, hits = self.measure(lambda: queryset.count(), options['repeat'])
+                page_ms, _ = self.measure(lambda: list(queryset[:10]), options['repeat'])
+                self.stdout.write(f'{query:<16}{name:<8}{count_ms:>10.1f}{page_ms:>10.1f}{hits:>10}')
+
+        if not options['keep']:
+            delete_users(User.objects.filter(pk=user.pk))
+
+    def measure(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), result
+
+    def seed(self, user, count, batch_size):
+        rng = random.Random(0)
+        start = time.perf_counter()
+        for offset in range(0, count, batch_size):
+            batch = [
+                Task(
+                    title=random_text(rng, rng.randint(2, 4)),
+                    description=random_text(rng, rng.randint(5, 30)),
+                    user=user,
+                )
+                for _ in range(min(batch_size, count - offset))
+            ]
+            with transaction.atomic():
+                Task.objects.bulk_create(batch)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'{count}件のタスクを投入しました（{elapsed:.1f}秒）')
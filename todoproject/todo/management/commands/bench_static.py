@@ -0,0 +1,122 @@
+import json
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.views import serve
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.test import Client, RequestFactory, override_settings
+from django.urls import reverse
+from django.utils.cache import get_max_age
+
+from todo.assets import serve_static
+from todo.seeding import ensure_categories, seed_tasks, seed_users
+
+
+class Command(BaseCommand):
+    help = (
+        'タスク一覧を初回（ブラウザのキャッシュなし）と2回目（キャッシュあり）に読み込んだときの'
+        'リクエスト数と転送量（本文のバイト数）を、現在の STATIC_PROFILE で測る'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=20, help='一覧に表示するタスク数')
+        parser.add_argument('--accept-encoding', default='br, gzip', help='ブラウザが送る Accept-Encoding')
+        parser.add_argument('--output', help='結果のJSONの保存先')
+
+    def handle(self, *args, **options):
+        if settings.STATIC_PROFILE == 'production':
+            # ハッシュ付きのファイル名と圧縮済みのファイルを STATIC_ROOT に書き出す
+            call_command('collectstatic', interactive=False, verbosity=0)
+
+        user = seed_users('staticbench', 1)[0]
+        seed_tasks(user, options['tasks'], ensure_categories())
+        self.client = Client()
+        self.client.force_login(user)
+        self.factory = RequestFactory()
+        self.accept_encoding = options['accept_encoding']
+
+        # DEBUG のときは {% static %} がハッシュなしのファイル名を返すため、本番と同じく DEBUG=False で測る
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            # 一覧の ETag はCSRFクッキーを含むため、先にクッキーを受け取っておく（計測には含めない）
+            self.client.get(reverse('task_list'))
+            cold, cache = self.load({})
+            warm, _ = self.load(cache)
+        report = {'profile': settings.STATIC_PROFILE, 'cold': cold, 'warm': warm}
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, ensure_ascii=False, indent=2))
+
+        self.stdout.write(f'STATIC_PROFILE={settings.STATIC_PROFILE}')
+        for name, result in (('初回', cold), ('2回目', warm)):
+            self.stdout.write(f'{name}: {result["requests"]}リクエスト、{result["bytes"]}バイト')
+            for entry in result['responses']:
+                self.stdout.write(
+                    f'  {entry["status"]} {entry["url"]:<48} {entry["bytes"]:>7} '
+                    f'{entry["encoding"] or "-":<5} {entry["cache_control"] or "-"}'
+                )
+
+    def load(self, cache):
+        """タスク一覧と、そこから読み込む静的ファイルをブラウザと同じように取得する
+
+        cache は前回の読み込みで受け取ったレスポンスのヘッダー（URLごと）。
+        max-age の期間内のファイルはリクエストせず、それ以外は条件付きで取得する。
+
+        Returns:
+            tuple: (結果, 今回のレスポンスのヘッダー)
+        """
+        responses, headers = [], {}
+        page_url = reverse('task_list')
+        previous = cache.get(page_url)
+        response = self.client.get(page_url, headers=self.conditional_headers(previous))
+        responses.append(self.describe(page_url, response, len(response.content)))
+        # 304 の場合はキャッシュしたページから静的ファイルを読み込む
+        headers[page_url] = response if response.status_code == 200 else previous
+        html = headers[page_url].content.decode()
+
+        pattern = rf'(?:href|src)="({re.escape(settings.STATIC_URL)}[^"]+)"'
+        for url in dict.fromkeys(re.findall(pattern, html)):
+            previous = cache.get(url)
+            if previous is not None and (get_max_age(previous) or 0) > 0:
+                # 期限内のキャッシュはブラウザが再検証しない
+                headers[url] = previous
+                continue
+            response = self.fetch_static(url, self.conditional_headers(previous))
+            body = b''.join(response.streaming_content) if response.streaming else response.content
+            responses.append(self.describe(url, response, len(body)))
+            headers[url] = response if response.status_code == 200 else previous
+
+        result = {
+            'requests': len(responses),
+            'bytes': sum(entry['bytes'] for entry in responses),
+            'responses': responses,
+        }
+        return result, headers
+
+    def fetch_static(self, url, headers):
+        path = url[len(settings.STATIC_URL):]
+        request = self.factory.get(url, headers={'Accept-Encoding': self.accept_encoding, **headers})
+        if settings.STATIC_PROFILE == 'production':
+            return serve_static(request, path)
+        return serve(request, path, insecure=True)
+
+    @staticmethod
+    def conditional_headers(previous):
+        if previous is None:
+            return {}
+        headers = {}
+        if previous.has_header('ETag'):
+            headers['If-None-Match'] = previous['ETag']
+        if previous.has_header('Last-Modified'):
+            headers['If-Modified-Since'] = previous['Last-Modified']
+        return headers
+
+    @staticmethod
+    def describe(url, response, size):
+        return {
+            'url': url,
+            'status': response.status_code,
+            'bytes': size,
+            'encoding': response.get('Content-Encoding'),
+            'cache_control': response.get('Cache-Control'),
+        }
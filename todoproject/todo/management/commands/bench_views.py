@@ -0,0 +1,231 @@
+import json
+import platform
+import random
+import re
+import statistics
+import time
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from todo.models import ArchivedTask, Task
+from todo.seeding import ensure_categories, seed_tasks, seed_users
+from todo.signals import tasks_changed
+from todo.views import task_list_paginator
+
+# 一覧の絞り込みの組み合わせ（category は計測時にカテゴリの主キーに置き換える）
+LIST_FILTERS = {
+    'all': {},
+    'category': {'category': None},
+    'priority': {'priority': 'high'},
+    'open': {'completed': 'false'},
+    'done': {'completed': 'true'},
+    # 完了済み + アーカイブ（todo.archive）したタスク
+    'archived': {'completed': 'true', 'archived': '1'},
+    'search': {'search': '打ち合わせ'},
+}
+LIST_SORTS = ('-created_date', 'due_date', 'priority')
+# 'deep' は何ページ目を読むか
+DEEP_PAGE = 5
+
+# Server-Timing ヘッダー（PerformanceMiddleware）のクエリ数とテンプレートのレンダリング時間
+QUERY_COUNT_PATTERN = re.compile(r'desc="(\d+) queries"')
+TEMPLATE_TIME_PATTERN = re.compile(r'tpl;dur=([\d.]+)')
+
+# 計測で作成したタスクのタイトルの接頭辞（計測後に削除する）
+CREATED_TITLE_PREFIX = 'bench_views '
+
+
+class Command(BaseCommand):
+    help = (
+        'テストクライアントでタスク一覧（絞り込み・並び替え・検索・ページの組み合わせ）と'
+        '作成・更新・切り替えを呼び、レイテンシとクエリ数を測ってJSONに保存する'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='合成データのユーザー数')
+        parser.add_argument('--tasks', type=int, default=10000, help='ユーザーごとのタスク数')
+        parser.add_argument('--prefix', default='seed', help='合成データのユーザー名の接頭辞（seed_tasks と同じ）')
+        parser.add_argument('--seed', type=int, default=0, help='合成データと計測の乱数のシード')
+        parser.add_argument('--repeat', type=int, default=20, help='1つの組み合わせの計測回数')
+        parser.add_argument('--warmup', type=int, default=2, help='計測前に捨てる回数')
+        parser.add_argument('--cache', action='store_true', help='タスク一覧のキャッシュを有効にしたまま測る')
+        parser.add_argument(
+            '--output', help='結果のJSONの保存先（省略時は benchmarks/bench_views-<日時>.json）',
+        )
+        parser.add_argument('--compare', help='比べる過去の結果のJSON')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat は1以上を指定してください')
+        baseline = None
+        if options['compare']:
+            baseline = json.loads(Path(options['compare']).read_text())
+
+        categories = ensure_categories()
+        users = seed_users(options['prefix'], options['users'])
+        for user in users:
+            seed_tasks(user, options['tasks'], categories, options['seed'])
+        user = users[0]
+
+        overrides = {'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver']}
+        if not options['cache']:
+            overrides['TODO_LIST_CACHE_TIMEOUT'] = 0
+        with override_settings(**overrides):
+            results = self.run(user, categories, options)
+
+        report = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'vendor': connection.vendor,
+                'database_profile': settings.DATABASE_PROFILE,
+                'pagination': settings.TODO_PAGINATION,
+                'async_views': settings.TODO_ASYNC_VIEWS,
+                'list_cache': options['cache'],
+                'users': options['users'],
+                'tasks_per_user': options['tasks'],
+                'seed': options['seed'],
+                'repeat': options['repeat'],
+                # 一覧が読むタスク表の行数（アーカイブした行は含めない）
+                'hot_tasks': Task.objects.count(),
+                'archived_tasks': ArchivedTask.objects.count(),
+            },
+            'results': results,
+        }
+        output = Path(options['output'] or f'benchmarks/bench_views-{timezone.now():%Y%m%d-%H%M%S}.json')
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+
+        self.stdout.write(f"タスク表 {report['meta']['hot_tasks']}件、アーカイブ {report['meta']['archived_tasks']}件")
+        self.write_table(results, baseline['results'] if baseline else None)
+        self.stdout.write(f'結果を {output} に保存しました')
+
+    def run(self, user, categories, options):
+        rng = random.Random(options['seed'])
+        client = Client()
+        client.force_login(user)
+        task_ids = list(Task.objects.filter(user=user).values_list('pk', flat=True))
+        category_id = next(pk for pk, _ in categories if pk is not None)
+
+        cases = {}
+        for filter_name, params in LIST_FILTERS.items():
+            if 'category' in params:
+                params = {'category': str(category_id)}
+            for sort in LIST_SORTS:
+                base = {**params, 'sort': sort}
+                for page_name, query in (('first', base), ('deep', self.deep_page(user, base))):
+                    cases[f'list {filter_name} {sort} {page_name}'] = (
+                        lambda query=query: client.get(reverse('task_list'), query)
+                    )
+
+        toggled = []
+
+        def create():
+            return client.post(reverse('task_create'), {
+                'title': f'{CREATED_TITLE_PREFIX}{rng.random():.6f}',
+                'priority': 'medium',
+                'category': category_id,
+            })
+
+        def update():
+            task = Task.objects.get(pk=rng.choice(task_ids))
+            # 値を変えずに保存する（データの分布を保つ）
+            return client.post(reverse('task_update', args=[task.pk]), {
+                'title': task.title,
+                'description': task.description,
+                'due_date': timezone.localtime(task.due_date).strftime('%Y-%m-%dT%H:%M') if task.due_date else '',
+                'category': task.category_id or '',
+                'priority': task.priority,
+            })
+
+        def toggle():
+            pk = rng.choice(task_ids)
+            toggled.append(pk)
+            return client.post(reverse('task_toggle_complete', args=[pk]))
+
+        cases.update({'create': create, 'update': update, 'toggle': toggle})
+
+        results = {}
+        try:
+            for name, request in cases.items():
+                results[name] = self.measure(name, request, options['repeat'], options['warmup'])
+        finally:
+            self.restore(user, toggled)
+        return results
+
+    def deep_page(self, user, params):
+        """DEEP_PAGE ページ目を読むパラメータ（カーソル方式では前のページをたどってカーソルを作る）"""
+        if settings.TODO_PAGINATION != 'keyset':
+            return {**params, 'page': str(DEEP_PAGE)}
+        paginator = task_list_paginator(user, params, keyset=True)
+        cursor = None
+        for _ in range(DEEP_PAGE - 1):
+            page = paginator.get_page(cursor)
+            if not page.next_cursor:
+                break
+            cursor = page.next_cursor
+        return {**params, 'cursor': cursor} if cursor else params
+
+    def measure(self, name, request, repeat, warmup):
+        for _ in range(warmup):
+            request()
+        timings, queries, template_timings = [], [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = request()
+            timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code not in (200, 302):
+                raise CommandError(f'{name}: ステータス {response.status_code}')
+            server_timing = response.get('Server-Timing', '')
+            match = QUERY_COUNT_PATTERN.search(server_timing)
+            queries.append(int(match.group(1)) if match else 0)
+            match = TEMPLATE_TIME_PATTERN.search(server_timing)
+            template_timings.append(float(match.group(1)) if match else 0.0)
+        return {
+            'n': repeat,
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'p50_ms': round(self.percentile(timings, 50), 3),
+            'p95_ms': round(self.percentile(timings, 95), 3),
+            'p99_ms': round(self.percentile(timings, 99), 3),
+            'template_p50_ms': round(self.percentile(template_timings, 50), 3),
+            'queries_mean': round(statistics.fmean(queries), 2),
+            'queries_max': max(queries),
+        }
+
+    def restore(self, user, toggled):
+        """計測で作成したタスクを削除し、奇数回切り替えたタスクを元に戻す"""
+        for task in Task.objects.filter(user=user, title__startswith=CREATED_TITLE_PREFIX):
+            task.delete()
+        odd = [pk for pk in set(toggled) if toggled.count(pk) % 2]
+        if odd:
+            Task.objects.toggle_completed(user, odd)
+            tasks_changed(user.pk)
+
+    @staticmethod
+    def percentile(values, percent):
+        if len(values) < 2:
+            return values[0] if values else 0.0
+        return statistics.quantiles(values, n=100)[percent - 1]
+
+    def write_table(self, results, baseline=None):
+        header = f"{'case':<36}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'tpl ms':>9}{'queries':>9}"
+        if baseline is not None:
+            header += f"{'p95 diff':>10}"
+        self.stdout.write(header)
+        for name, result in results.items():
+            line = (
+                f"{name:<36}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+                f"{result.get('template_p50_ms', 0):>9.1f}{result['queries_mean']:>9.1f}"
+            )
+            if baseline is not None and name in baseline and baseline[name]['p95_ms']:
+                diff = (result['p95_ms'] / baseline[name]['p95_ms'] - 1) * 100
+                line += f'{diff:>+9.0f}%'
+            self.stdout.write(line)
@@ -0,0 +1,48 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from todo.importer import IMPORT_BATCH_SIZE, IMPORT_FORMATS, guess_format, import_tasks
+
+
+class Command(BaseCommand):
+    help = 'CSVまたはJSON Linesのファイルからタスクを一括でインポートする'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="インポートするファイル（'-' で標準入力）")
+        parser.add_argument('--user', required=True, help='タスクの所有者のユーザー名')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='ファイルの形式（省略時は拡張子から判定）')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='1トランザクションで保存する件数')
+        parser.add_argument('--max-errors', type=int, default=20, help='表示するエラー行の最大数')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"ユーザーが見つかりません: {options['user']}")
+
+        path = options['path']
+        import_format = options['format'] or guess_format(path)
+        if import_format is None:
+            raise CommandError('形式を判定できません。--format を指定してください')
+
+        if path == '-':
+            result = import_tasks(user, sys.stdin.buffer, import_format, options['batch_size'])
+        else:
+            try:
+                with open(path, 'rb') as stream:
+                    result = import_tasks(user, stream, import_format, options['batch_size'])
+            except OSError as e:
+                raise CommandError(f'ファイルを開けません: {e}')
+
+        for line, errors in result.errors[:options['max_errors']]:
+            for field, messages in errors.items():
+                self.stderr.write(f"{line}行目 {field}: {' '.join(messages)}")
+        if len(result.errors) > options['max_errors']:
+            self.stderr.write(f"...ほか{len(result.errors) - options['max_errors']}行のエラー")
+
+        self.stdout.write(
+            f'{result.created}件をインポートしました（エラー{len(result.errors)}件、'
+            f'{result.elapsed:.1f}秒、{result.rows_per_second:.0f}行/秒）'
+        )
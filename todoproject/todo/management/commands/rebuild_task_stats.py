@@ -0,0 +1,52 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from todo.models import ArchivedTask, Task, TaskStats
+from todo.stats import rebuild, verify
+
+
+class Command(BaseCommand):
+    help = 'ユーザーごとのタスクの件数（TaskStats）をタスク表から作り直す、または検証する'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', default=[], help='対象のユーザー名（複数指定可、省略時は全員）')
+        parser.add_argument('--verify', action='store_true', help='作り直さずに、保存されている件数が正しいか確認する')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user_ids = list(User.objects.filter(username__in=options['user']).values_list('pk', flat=True))
+            if len(user_ids) != len(set(options['user'])):
+                raise CommandError('見つからないユーザーがあります')
+        else:
+            user_ids = sorted(
+                set(Task.objects.order_by().values_list('user_id', flat=True).distinct())
+                | set(ArchivedTask.objects.order_by().values_list('user_id', flat=True).distinct())
+                | set(TaskStats.objects.values_list('user_id', flat=True))
+            )
+
+        if options['verify']:
+            self.verify(user_ids)
+            return
+
+        for user_id in user_ids:
+            with transaction.atomic():
+                rebuild(user_id)
+        self.stdout.write(f'{len(user_ids)}人分の件数を作り直しました')
+
+    def verify(self, user_ids):
+        stored = TaskStats.objects.in_bulk(user_ids)
+        mismatched = 0
+        for user_id in user_ids:
+            stats = stored.get(user_id)
+            if stats is None:
+                # 集計行は最初に読むか変更したときに作られる
+                continue
+            differences = verify(stats)
+            if differences:
+                mismatched += 1
+                for name, (actual, expected) in differences.items():
+                    self.stderr.write(f'user_id={user_id} {name}: 保存値 {actual} / 集計値 {expected}')
+        if mismatched:
+            raise CommandError(f'{mismatched}人分の件数が一致しません（--verify を外して実行すると作り直します）')
+        self.stdout.write(f'{len(stored)}人分の件数を確認しました')
@@ -0,0 +1,44 @@
+import re
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from todo.seeding import delete_users, ensure_categories, seed_tasks, seed_users
+
+
+class Command(BaseCommand):
+    help = '性能計測用に、ユーザー N 人 × タスク M 件の合成データを作る（同じシードからは同じデータ）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='ユーザー数')
+        parser.add_argument('--tasks', type=int, default=1000, help='ユーザーごとのタスク数')
+        parser.add_argument('--prefix', default='seed', help='ユーザー名の接頭辞（seed0000, seed0001, ...）')
+        parser.add_argument('--password', help='ユーザーのパスワード（省略時はログインできないユーザー）')
+        parser.add_argument('--seed', type=int, default=0, help='乱数のシード')
+        parser.add_argument('--batch-size', type=int, default=5000, help='1回の bulk_create で保存する件数')
+        parser.add_argument('--clear', action='store_true', help='接頭辞が一致するユーザーとそのタスクを削除してから作る')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['tasks'] < 0:
+            raise CommandError('--users は1以上、--tasks は0以上を指定してください')
+        if options['clear']:
+            self.clear(options['prefix'])
+
+        start = time.perf_counter()
+        categories = ensure_categories()
+        users = seed_users(options['prefix'], options['users'], options['password'])
+        created = 0
+        for user in users:
+            created += seed_tasks(user, options['tasks'], categories, options['seed'], options['batch_size'])
+        elapsed = time.perf_counter() - start
+        rate = created / elapsed if elapsed else 0
+        self.stdout.write(
+            f'{len(users)}人のユーザーに{created}件のタスクを追加しました（{elapsed:.1f}秒、{rate:.0f}件/秒）'
+        )
+
+    def clear(self, prefix):
+        users = User.objects.filter(username__regex=rf'^{re.escape(prefix)}[0-9]{{4}}$')
+        count = users.count()
+        deleted = delete_users(users)
+        self.stdout.write(f'{count}人のユーザーと{deleted}件のタスクを削除しました')
@@ -0,0 +1,43 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from todo.reminders import REMINDER_BATCH_SIZE, MemorySink, ReminderEngine, get_sink
+
+
+class Command(BaseCommand):
+    help = '期限が近いタスクと期限切れのタスクのリマインダーを全ユーザー分送る（送信済みのものは送らない）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window-hours', type=float, default=24, help='期限が近いとみなす時間')
+        parser.add_argument('--overdue-days', type=float, default=7, help='期限切れを通知する日数（これより前は送らない）')
+        parser.add_argument('--batch-size', type=int, default=REMINDER_BATCH_SIZE, help='1バッチで読むタスク数')
+        parser.add_argument('--time-budget', type=float, help='処理時間の上限（秒）。超えたらバッチの区切りで止める')
+        parser.add_argument('--sink', help='送信先のクラスのパス（省略時は settings.TODO_REMINDER_SINK）')
+        parser.add_argument('--dry-run', action='store_true', help='送信も記録もせず、送る件数だけを数える')
+
+    def handle(self, *args, **options):
+        if options['window_hours'] < 0 or options['overdue_days'] < 0:
+            raise CommandError('--window-hours と --overdue-days は0以上を指定してください')
+        try:
+            sink = MemorySink() if options['dry_run'] else get_sink(options['sink'])
+        except ImportError as e:
+            raise CommandError(f'送信先のクラスを読み込めません: {e}')
+
+        engine = ReminderEngine(
+            sink,
+            window=datetime.timedelta(hours=options['window_hours']),
+            overdue_lookback=datetime.timedelta(days=options['overdue_days']),
+            batch_size=options['batch_size'],
+            time_budget=options['time_budget'],
+            record=not options['dry_run'],
+        )
+        result = engine.run()
+        rate = result.scanned / result.elapsed if result.elapsed else 0
+        verb = '送る予定' if options['dry_run'] else '送信'
+        self.stdout.write(
+            f'送信済みでない{result.scanned}件のタスクを{result.batches}バッチで読み込み、{result.sent}件を{verb}'
+            f'（{result.elapsed:.1f}秒、{rate:.0f}件/秒）'
+        )
+        if not result.finished:
+            self.stdout.write(self.style.WARNING('処理時間の上限に達したため途中で止めました（次回の実行で続きを処理します）'))
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from todo.db import copy_sqlite, replica_alias
+
+
+class Command(BaseCommand):
+    help = (
+        '主（default）のSQLiteのデータベースを複製（DATABASE_REPLICA_URL）へコピーする。'
+        'ローカルでレプリケーションの代わりに使い、--lag と --interval で複製の遅れを再現する'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lag', type=float, default=0, help='主を読んでから複製へ書き込むまでの秒数')
+        parser.add_argument('--interval', type=float, help='コピーを繰り返す間隔（秒。省略時は1回だけ）')
+        parser.add_argument('--count', type=int, help='--interval で繰り返す回数（省略時は止めるまで）')
+
+    def handle(self, *args, **options):
+        alias = replica_alias()
+        if alias is None:
+            raise CommandError('複製が設定されていません（DATABASE_REPLICA_URL を指定してください）')
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[alias]
+        if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError('sync_replica はSQLiteだけに対応しています（PostgreSQLではレプリケーションを使ってください）')
+        if primary.settings_dict['NAME'] == replica.settings_dict['NAME']:
+            raise CommandError('主と複製に同じファイルが指定されています')
+        if options['lag'] < 0 or (options['interval'] is not None and options['interval'] <= 0):
+            raise CommandError('--lag は0以上、--interval は0より大きい値を指定してください')
+
+        primary.ensure_connection()
+        replica.ensure_connection()
+        copied = 0
+        while True:
+            start = time.monotonic()
+            copy_sqlite(primary.connection, replica.connection, options['lag'])
+            copied += 1
+            self.stdout.write(
+                f'{timezone.localtime():%H:%M:%S} 複製を更新しました（{options["lag"]:g}秒前の主の内容）'
+            )
+            if options['interval'] is None or (options['count'] is not None and copied >= options['count']):
+                break
+            time.sleep(max(0, options['interval'] - (time.monotonic() - start)))
@@ -0,0 +1,235 @@
+"""
+リクエストごとの処理時間の計測と、ビューごとのヒストグラム
+
+PerformanceMiddleware（todo.middleware）がリクエストごとに RequestTimer を作り、
+実行中のリクエストのタイマーはコンテキスト変数で参照する。非同期ビューから
+sync_to_async で実行したクエリも、コンテキストが引き継がれるため同じタイマーに記録される。
+
+- クエリ: 接続を開いたときに execute_wrappers へ record_query を追加して数える
+- テンプレート: install_template_timer でテンプレートの render を包んで測る
+"""
+
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# 実行中のリクエストのタイマー（リクエストの外では None）
+current_timer = contextvars.ContextVar('todo_request_timer', default=None)
+
+# 処理時間のヒストグラムの上限（ミリ秒）
+DURATION_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# クエリ数のヒストグラムの上限
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class QueryBudgetExceeded(Exception):
+    """ビューが宣言したクエリ数の上限を超えた（settings.TODO_QUERY_BUDGET_STRICT のとき送出）"""
+
+
+def query_budget(max_queries):
+    """ビューが1リクエストで発行してよいクエリ数の上限を宣言する
+
+    セッションとユーザーの読み込みも含めた、リクエスト全体のクエリ数で数える。
+    件数の集計行の作り直しのように最初の1回だけ発行するクエリも含めて決める。
+    PerformanceMiddleware が上限を超えたリクエストを警告としてログに出し、
+    settings.TODO_QUERY_BUDGET_STRICT のときは QueryBudgetExceeded を送出する
+    （テストでは上限を超えたビューのテストが失敗する）。
+
+    使用例:
+        @query_budget(5)
+        @login_required
+        def task_list(request): ...
+    """
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+class RequestTimer:
+    """1リクエスト分の処理時間、クエリ数、クエリ時間、テンプレートのレンダリング時間
+
+    Attributes:
+        view: ビューの名前（URLの name。解決できない場合は None）
+        budget: ビューのクエリ数の上限（宣言されていない場合は None）
+        queries: 発行したクエリ数
+        db_time: クエリの合計秒数
+        template_time: テンプレートのレンダリングの合計秒数
+        total_time: リクエスト全体の秒数（finish で確定する）
+    """
+
+    def __init__(self):
+        self.view = None
+        self.budget = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.total_time = 0.0
+        self._template_depth = 0
+        self._start = time.perf_counter()
+
+    def finish(self):
+        self.total_time = time.perf_counter() - self._start
+
+    @property
+    def over_budget(self):
+        return self.budget is not None and self.queries > self.budget
+
+    def server_timing(self):
+        """Server-Timing ヘッダーの値"""
+        return ', '.join([
+            f'total;dur={self.total_time * 1000:.1f}',
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+        ])
+
+    def as_dict(self):
+        return {
+            'view': self.view,
+            'total_ms': round(self.total_time * 1000, 2),
+            'db_ms': round(self.db_time * 1000, 2),
+            'queries': self.queries,
+            'template_ms': round(self.template_time * 1000, 2),
+            'query_budget': self.budget,
+        }
+
+
+def record_query(execute, sql, params, many, context):
+    """接続の execute_wrappers に追加し、実行中のリクエストのクエリ数と時間を数える"""
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.queries += 1
+        timer.db_time += time.perf_counter() - start
+
+
+def add_query_recorder(sender, connection, **kwargs):
+    """connection_created で呼ばれ、新しい接続に record_query を追加する"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_template_timer():
+    """テンプレートエンジン（DjangoTemplates）の render を包み、レンダリング時間を数える
+
+    テンプレートの中から render_to_string を呼んだ場合に二重に数えないよう、
+    一番外側の render だけを測る。
+    """
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, 'timed', False):
+        return
+    render = Template.render
+
+    @wraps(render)
+    def timed_render(self, *args, **kwargs):
+        timer = current_timer.get()
+        if timer is None or timer._template_depth:
+            return render(self, *args, **kwargs)
+        timer._template_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            timer._template_depth -= 1
+            timer.template_time += time.perf_counter() - start
+
+    timed_render.timed = True
+    Template.render = timed_render
+
+
+class Histogram:
+    """累積バケットのヒストグラム（Prometheusの histogram と同じ形）"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def cumulative(self):
+        """(上限, その上限以下の件数) のリスト（最後の上限は '+Inf'）"""
+        total = 0
+        result = []
+        for bucket, count in zip([*self.buckets, '+Inf'], self.counts):
+            total += count
+            result.append((bucket, total))
+        return result
+
+
+class ViewMetrics:
+    """ビューごとのヒストグラムと件数（プロセスごと）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def observe(self, timer):
+        with self._lock:
+            metrics = self._views.get(timer.view)
+            if metrics is None:
+                metrics = self._views[timer.view] = {
+                    'duration_ms': Histogram(DURATION_BUCKETS_MS),
+                    'db_ms': Histogram(DURATION_BUCKETS_MS),
+                    'template_ms': Histogram(DURATION_BUCKETS_MS),
+                    'queries': Histogram(QUERY_COUNT_BUCKETS),
+                    'over_budget': 0,
+                }
+            metrics['duration_ms'].observe(timer.total_time * 1000)
+            metrics['db_ms'].observe(timer.db_time * 1000)
+            metrics['template_ms'].observe(timer.template_time * 1000)
+            metrics['queries'].observe(timer.queries)
+            if timer.over_budget:
+                metrics['over_budget'] += 1
+
+    def reset(self):
+        with self._lock:
+            self._views = {}
+
+    def snapshot(self):
+        """ビュー名 → ヒストグラムと件数 の辞書のコピー"""
+        with self._lock:
+            return {
+                view: {
+                    name: (value if isinstance(value, int) else (value.cumulative(), value.sum, value.count))
+                    for name, value in metrics.items()
+                }
+                for view, metrics in self._views.items()
+            }
+
+    def prometheus(self):
+        """Prometheusのテキスト形式で出力する"""
+        lines = []
+        snapshot = self.snapshot()
+        for name in ('duration_ms', 'db_ms', 'template_ms', 'queries'):
+            metric = f'todo_request_{name}'
+            lines.append(f'# TYPE {metric} histogram')
+            for view, metrics in sorted(snapshot.items(), key=lambda item: item[0] or ''):
+                buckets, total, count = metrics[name]
+                label = f'view="{view or "unresolved"}"'
+                for bucket, cumulative in buckets:
+                    lines.append(f'{metric}_bucket{{{label},le="{bucket}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{{label}}} {total:.3f}')
+                lines.append(f'{metric}_count{{{label}}} {count}')
+        lines.append('# TYPE todo_request_over_query_budget_total counter')
+        for view, metrics in sorted(snapshot.items(), key=lambda item: item[0] or ''):
+            lines.append(
+                f'todo_request_over_query_budget_total{{view="{view or "unresolved"}"}} {metrics["over_budget"]}'
+            )
+        return '\n'.join(lines) + '\n'
+
+
+view_metrics = ViewMetrics()
@@ -0,0 +1,96 @@
+import json
+import logging
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+
+from .caches import user_cache
+from .metrics import QueryBudgetExceeded, RequestTimer, current_timer, view_metrics
+
+logger = logging.getLogger('todo.performance')
+
+
+class PerformanceMiddleware:
+    """リクエストごとの処理時間、クエリ数・時間、テンプレートのレンダリング時間を記録する
+
+    - レスポンスの Server-Timing ヘッダーに出す（ブラウザの開発者ツールで見られる）
+    - 'todo.performance' ロガーにJSONの1行で出す（INFO）
+    - ビューごとのヒストグラム（todo.metrics.view_metrics）に加える
+
+    ビューが query_budget で宣言した上限を超えた場合は警告を出し、
+    settings.TODO_QUERY_BUDGET_STRICT のときは QueryBudgetExceeded を送出する。
+
+    セッションやユーザーの読み込みも測るため、MIDDLEWARE の先頭に置く。
+    非同期ビューでもスレッドを挟まずに動くよう、同期・非同期の両方に対応する。
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timer = RequestTimer()
+        token = current_timer.set(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.finish(request, response, timer)
+
+    async def __acall__(self, request):
+        timer = RequestTimer()
+        token = current_timer.set(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.finish(request, response, timer)
+
+    def finish(self, request, response, timer):
+        timer.finish()
+        match = request.resolver_match
+        if match is not None:
+            timer.view = match.view_name
+            timer.budget = getattr(match.func, 'query_budget', None)
+        view_metrics.observe(timer)
+        response['Server-Timing'] = timer.server_timing()
+
+        record = {'method': request.method, 'path': request.path, 'status': response.status_code, **timer.as_dict()}
+        if timer.over_budget:
+            logger.warning(json.dumps(record))
+            if getattr(settings, 'TODO_QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(
+                    f'{timer.view} が {timer.queries} 回のクエリを発行した（上限 {timer.budget} 回）'
+                )
+        else:
+            logger.info(json.dumps(record))
+        return response
+
+
+async def _auser(request):
+    if not hasattr(request, '_acached_user'):
+        request._acached_user = await sync_to_async(user_cache.get_user)(request)
+    return request._acached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware の代わりに、ログインユーザーをプロセス内キャッシュから設定する
+
+    セッションの認証ハッシュがキャッシュしたユーザーと一致すれば auth_user を読まない
+    （todo.caches.UserCache）。request.user と request.auser() の両方を設定する。
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: user_cache.get_user(request))
+        request.auser = partial(_auser, request)
@@ -0,0 +1,63 @@
+# Generated by Django 5.0.7 on 2026-10-18 10:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("todo", "0004_task_filter_sort_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="task",
+            name="task_user_created_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="task",
+            name="task_user_done_created_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="task",
+            name="task_user_cat_created_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="task",
+            name="task_user_pri_created_idx",
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["user", "created_date"], name="task_user_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["user", "priority"], name="task_user_priority_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["user", "completed", "created_date"],
+                name="task_user_done_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["user", "category", "created_date"],
+                name="task_user_cat_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["user", "priority", "created_date"],
+                name="task_user_pri_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.7 on 2026-10-18 11:00
+
+from django.db import migrations
+
+
+def install_fts(apps, schema_editor):
+    from todo import search
+
+    search.install(schema_editor.connection)
+    search.rebuild(schema_editor.connection)
+
+
+def uninstall_fts(apps, schema_editor):
+    from todo import search
+
+    search.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("todo", "0005_task_ascending_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(install_fts, uninstall_fts),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.7 on 2026-10-18 18:00
+
+from django.db import migrations
+
+import todo.fields
+
+# 0008より前は文字列、以降は順位の整数で保存する
+PRIORITY_RANKS = {'low': '1', 'medium': '2', 'high': '3'}
+
+
+def priority_to_rank(apps, schema_editor):
+    Task = apps.get_model('todo', 'Task')
+    for value, rank in PRIORITY_RANKS.items():
+        Task.objects.filter(priority=value).update(priority=rank)
+    # 想定外の値は「中」として扱う
+    Task.objects.exclude(priority__in=PRIORITY_RANKS.values()).update(priority=PRIORITY_RANKS['medium'])
+
+
+def rank_to_priority(apps, schema_editor):
+    Task = apps.get_model('todo', 'Task')
+    for value, rank in PRIORITY_RANKS.items():
+        Task.objects.filter(priority=rank).update(priority=value)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("todo", "0007_task_updated_at_watermark"),
+    ]
+
+    operations = [
+        # 列の型を変える前に、文字列のまま順位の数字に置き換える
+        migrations.RunPython(priority_to_rank, rank_to_priority),
+        migrations.AlterField(
+            model_name="task",
+            name="priority",
+            field=todo.fields.PriorityField(
+                choices=[("low", "低"), ("medium", "中"), ("high", "高")],
+                default="medium",
+            ),
+        ),
+    ]
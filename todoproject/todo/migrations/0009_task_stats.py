@@ -0,0 +1,43 @@
+# Generated by Django 5.0.7 on 2026-10-18 18:25
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("todo", "0008_task_priority_rank"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("open_count", models.IntegerField(default=0)),
+                ("completed_count", models.IntegerField(default=0)),
+                ("open_high", models.IntegerField(default=0)),
+                ("open_medium", models.IntegerField(default=0)),
+                ("open_low", models.IntegerField(default=0)),
+                ("by_category", models.JSONField(default=dict)),
+                ("overdue_count", models.IntegerField(default=0)),
+                (
+                    "overdue_as_of",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("next_due_at", models.DateTimeField(blank=True, null=True)),
+                ("overdue_stale", models.BooleanField(default=False)),
+            ],
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.0.7 on 2026-10-18 19:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("todo", "0009_task_stats"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskReminder",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("due_soon", "期限が近い"), ("overdue", "期限切れ")],
+                        max_length=10,
+                    ),
+                ),
+                ("due_date", models.DateTimeField()),
+                ("sent_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["completed", "due_date"], name="task_done_due_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="taskreminder",
+            name="task",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="reminders",
+                to="todo.task",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="taskreminder",
+            constraint=models.UniqueConstraint(
+                fields=("task", "kind", "due_date"), name="task_reminder_unique"
+            ),
+        ),
+    ]
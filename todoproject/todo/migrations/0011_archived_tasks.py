@@ -0,0 +1,72 @@
+# Generated by Django 5.0.7 on 2026-10-18 19:27
+
+import django.db.models.deletion
+import django.utils.timezone
+import todo.fields
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("todo", "0010_task_reminders"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedTask",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("title", models.CharField(max_length=200)),
+                ("description", models.TextField(blank=True)),
+                ("created_date", models.DateTimeField()),
+                ("due_date", models.DateTimeField(blank=True, null=True)),
+                ("completed", models.BooleanField(default=True)),
+                (
+                    "priority",
+                    todo.fields.PriorityField(
+                        choices=[("low", "低"), ("medium", "中"), ("high", "高")],
+                        default="medium",
+                    ),
+                ),
+                ("updated_at", models.DateTimeField()),
+                (
+                    "archived_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "category",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="archived_tasks",
+                        to="todo.category",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_tasks",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["user", "created_date"],
+                        name="archived_user_created_idx",
+                    ),
+                    models.Index(
+                        fields=["user", "due_date"], name="archived_user_due_idx"
+                    ),
+                    models.Index(
+                        fields=["user", "priority"], name="archived_user_priority_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
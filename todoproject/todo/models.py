@@ -1,5 +1,10 @@
-from django.db import models
+from collections import namedtuple
+
+from django.db import connections, models, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .fields import PriorityField
 
 
 class Category(models.Model):
@@ -28,6 +33,182 @@ class Category(models.Model):
         verbose_name_plural = "Categories"
 
 
+# 集計（TaskStats）に関わるタスクの値
+TaskState = namedtuple('TaskState', ['completed', 'priority', 'category_id', 'due_date'])
+TASK_STATE_FIELDS = {'completed', 'priority', 'category_id', 'due_date'}
+
+
+class TaskQuerySet(models.QuerySet):
+    """タスクのクエリセット
+
+    完了状態の更新を、対象ユーザーに限定した1回のUPDATE文で行うメソッドを持つ。
+    """
+
+    def toggle_completed(self, user, pks):
+        """指定したタスクの完了状態を反転する
+
+        アーカイブしたタスク（ArchivedTask）は未完了にして todo_task に戻す。
+
+        Args:
+            user (User): タスクの所有者
+            pks (Iterable[int]): 対象タスクのプライマリーキー
+
+        Returns:
+            dict: 更新したタスクのプライマリーキーと新しい完了状態
+                  （他のユーザーのタスクや存在しないタスクは含まない）
+        """
+        return self._update_completed(user, pks, toggle=True)
+
+    def complete(self, user, pks):
+        """指定したタスクのうち未完了のものを完了にする
+
+        Returns:
+            dict: 完了にしたタスクのプライマリーキーと新しい完了状態
+        """
+        return self._update_completed(user, pks, toggle=False)
+
+    def _update_completed(self, user, pks, toggle):
+        pks = list(pks)
+        if not pks:
+            return {}
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        opts = self.model._meta
+        completed = qn(opts.get_field('completed').column)
+        updated_at = opts.get_field('updated_at')
+        pk = qn(opts.pk.column)
+        placeholders = ', '.join(['%s'] * len(pks))
+        sql = (
+            f'UPDATE {qn(opts.db_table)} '
+            f'SET {completed} = {f"NOT {completed}" if toggle else "TRUE"}, {qn(updated_at.column)} = %s '
+            f'WHERE {qn(opts.get_field("user").column)} = %s AND {pk} IN ({placeholders})'
+        )
+        if not toggle:
+            sql += f' AND NOT {completed}'
+        now = updated_at.get_db_prep_value(timezone.now(), connection)
+        params = [now, user.pk, *pks]
+
+        from .stats import record_changes
+
+        state_fields = [opts.get_field(name) for name in ('priority', 'category', 'due_date')]
+        with transaction.atomic(using=self.db):
+            if connection.vendor in ('sqlite', 'postgresql') and connection.features.can_return_rows_from_bulk_insert:
+                # UPDATE ... RETURNING で更新後の値（と集計用の列）を同じ文で受け取る
+                returning = ', '.join([pk, completed, *(qn(field.column) for field in state_fields)])
+                with connection.cursor() as cursor:
+                    cursor.execute(f'{sql} RETURNING {returning}', params)
+                    rows = [
+                        (row[0], TaskState(bool(row[1]), *self._from_db(state_fields, row[2:], connection)))
+                        for row in cursor.fetchall()
+                    ]
+            else:
+                # UPDATE ... RETURNING に対応しないデータベースでは同じトランザクションで読み直す
+                targets = self.select_for_update().filter(user=user, pk__in=pks)
+                if not toggle:
+                    targets = targets.filter(completed=False)
+                changed = list(targets.values_list('pk', flat=True))
+                with connection.cursor() as cursor:
+                    cursor.execute(sql, params)
+                rows = [
+                    (row[0], TaskState(*row[1:]))
+                    for row in self.filter(pk__in=changed).values_list(
+                        'pk', 'completed', 'priority', 'category_id', 'due_date',
+                    )
+                ]
+            # 完了状態だけが反転したので、更新前の状態は completed の逆
+            record_changes(user.pk, [(state._replace(completed=not state.completed), state) for _, state in rows])
+            result = {pk: state.completed for pk, state in rows}
+            if toggle and len(result) < len(pks):
+                # todo_task にないタスクはアーカイブにあれば未完了にして戻す
+                from .archive import restore_tasks
+
+                result.update(restore_tasks(user, [pk for pk in pks if pk not in result], using=self.db))
+        return result
+
+    def update_task(self, user, pk, values):
+        """1件のタスクの列を、インスタンスを読み込まずに更新する
+
+        集計（TaskStats）に関わる列を含まない場合は、ユーザーで絞り込んだ1回のUPDATE文だけで済ませる。
+        含む場合は、同じトランザクションで集計用の列だけをロックして読み、差分を件数に反映する。
+        一覧のキャッシュと最終変更日時の更新（tasks_changed）は呼び出し側で行う。
+
+        Args:
+            user (User): タスクの所有者
+            pk (int): 対象タスクのプライマリーキー
+            values (dict): 列名と新しい値（title / due_date / priority / category_id など）
+
+        Returns:
+            bool: 更新したか（他のユーザーのタスクや存在しないタスクは False）
+        """
+        targets = self.filter(user=user, pk=pk)
+        values = {**values, 'updated_at': timezone.now()}
+        if TASK_STATE_FIELDS.isdisjoint(values):
+            return targets.update(**values) > 0
+
+        from .stats import record_changes
+
+        with transaction.atomic(using=self.db):
+            row = targets.select_for_update().values_list(*TaskState._fields).first()
+            if row is None:
+                return False
+            targets.update(**values)
+            before = TaskState(*row)
+            after = before._replace(**{name: values[name] for name in TaskState._fields if name in values})
+            record_changes(user.pk, [(before, after)])
+        return True
+
+    def delete_tasks(self, user, pks):
+        """指定したタスクをまとめて削除する
+
+        タスクごとのシグナル（post_delete）を送らず、リマインダーの記録とタスクをそれぞれ
+        1回のDELETE文で削除し、件数（TaskStats）に1回で反映する。
+        一覧のキャッシュと最終変更日時の更新（tasks_changed）は呼び出し側で行う。
+
+        Args:
+            user (User): タスクの所有者
+            pks (Iterable[int]): 対象タスクのプライマリーキー
+
+        Returns:
+            list: 削除したタスクのプライマリーキー（他のユーザーのタスクや存在しないタスクは含まない）
+        """
+        pks = list(pks)
+        if not pks:
+            return []
+
+        from .stats import record_changes
+
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        opts = self.model._meta
+        with transaction.atomic(using=self.db):
+            rows = list(
+                self.select_for_update().filter(user=user, pk__in=pks).values_list('pk', *TaskState._fields)
+            )
+            if not rows:
+                return []
+            deleted = [row[0] for row in rows]
+            TaskReminder.objects.using(self.db).filter(task_id__in=deleted).delete()
+            placeholders = ', '.join(['%s'] * len(deleted))
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {qn(opts.db_table)} '
+                    f'WHERE {qn(opts.get_field("user").column)} = %s AND {qn(opts.pk.column)} IN ({placeholders})',
+                    [user.pk, *deleted],
+                )
+            record_changes(user.pk, [(TaskState(*row[1:]), None) for row in rows])
+        return deleted
+
+    @staticmethod
+    def _from_db(fields, values, connection):
+        # 生のSQLで読んだ値を、クエリセットで読んだときと同じPythonの値にする
+        for field, value in zip(fields, values):
+            expression = field.get_col(field.model._meta.db_table)
+            converters = connection.ops.get_db_converters(expression) + expression.get_db_converters(connection)
+            for converter in converters:
+                value = converter(value, expression, connection)
+            yield value
+
+
 class Task(models.Model):
     """タスクモデル
 
@@ -42,6 +223,7 @@ class Task(models.Model):
         category: タスクのカテゴリ
         priority: タスクの優先度
         user: タスクの所有者
+        updated_at: タスクの最終更新日時
     """
     PRIORITY_CHOICES = [
         ('low', '低'),
@@ -55,8 +237,185 @@ class Task(models.Model):
     due_date = models.DateTimeField(null=True, blank=True)
     completed = models.BooleanField(default=False)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
-    priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='medium')
+    # データベースには順位（低=1, 中=2, 高=3）を保存する
+    priority = PriorityField(choices=PRIORITY_CHOICES, default='medium')
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TaskQuerySet.as_manager()
+
+    # アーカイブ済みのタスク（ArchivedTask）と一覧で区別する
+    archived = False
+
+    def __str__(self):
+        return f'{self.title} （期限: {self.due_date}）'
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 保存時に集計の差分を求めるため、読み込んだときの状態を覚えておく
+        # （.only() などで一部の列を読んでいない場合は None）
+        instance._loaded_state = instance.state() if TASK_STATE_FIELDS <= set(field_names) else None
+        return instance
+
+    def state(self):
+        """集計（TaskStats）に関わる現在の値"""
+        return TaskState(self.completed, self.priority, self.category_id, self.due_date)
+
+    class Meta:
+        # filter_tasks（ユーザー + カテゴリ/優先度/完了状態）と
+        # sort_tasks（期限/作成日時/優先度）の組み合わせをインデックスで処理する。
+        # 並び順の第2キーの主キーもインデックスの順序で満たせるよう、列はすべて昇順にする
+        # （降順の列と昇順のrowidが混ざると逆方向の走査で順序が合わない）
+        indexes = [
+            models.Index(fields=['user', 'due_date'], name='task_user_due_idx'),
+            models.Index(fields=['user', 'created_date'], name='task_user_created_idx'),
+            models.Index(fields=['user', 'priority'], name='task_user_priority_idx'),
+            models.Index(fields=['user', 'completed', 'due_date'], name='task_user_done_due_idx'),
+            models.Index(fields=['user', 'completed', 'created_date'], name='task_user_done_created_idx'),
+            models.Index(fields=['user', 'completed', 'priority'], name='task_user_done_priority_idx'),
+            models.Index(fields=['user', 'category', 'due_date'], name='task_user_cat_due_idx'),
+            models.Index(fields=['user', 'category', 'created_date'], name='task_user_cat_created_idx'),
+            models.Index(fields=['user', 'category', 'priority'], name='task_user_cat_priority_idx'),
+            models.Index(fields=['user', 'priority', 'due_date'], name='task_user_pri_due_idx'),
+            models.Index(fields=['user', 'priority', 'created_date'], name='task_user_pri_created_idx'),
+            # リマインダー（todo.reminders）が全ユーザーの未完了タスクを期限の範囲で走査する
+            models.Index(fields=['completed', 'due_date'], name='task_done_due_idx'),
+        ]
+
+
+class TaskWatermark(models.Model):
+    """ユーザーごとのタスクの最終変更日時
+
+    タスクの作成・更新・削除・切り替えのたびに更新し、一覧・詳細ページの
+    条件付きGET（ETag / Last-Modified）の判定に使う。削除も反映するため、
+    Task.updated_at の最大値ではなくこの表で管理する。
+
+    Attributes:
+        user: タスクの所有者
+        modified_at: そのユーザーのタスクが最後に変更された日時
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    modified_at = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.user} （最終変更: {self.modified_at}）'
+
+    @classmethod
+    def touch(cls, user_id):
+        """ユーザーの最終変更日時を現在時刻にする（1回のUPSERT文）"""
+        cls.objects.bulk_create(
+            [cls(user_id=user_id, modified_at=timezone.now())],
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['modified_at'],
+        )
+
+
+class TaskStats(models.Model):
+    """ユーザーごとのタスクの件数（非正規化した集計）
+
+    タスクの作成・更新・削除・切り替えのたびに差分だけを反映し、
+    集計クエリを発行せずに主キーの検索1回で件数を返せるようにする。
+    差分の反映は todo.stats.record_changes で行う。
+
+    期限切れの件数は時間の経過で変わるため、overdue_as_of 時点の件数として持ち、
+    未完了タスクの次の期限（next_due_at）を過ぎたときだけ数え直す。
+
+    Attributes:
+        user: タスクの所有者
+        open_count: 未完了のタスク数
+        completed_count: 完了したタスク数
+        open_high / open_medium / open_low: 優先度ごとの未完了のタスク数
+        by_category: カテゴリIDごとの [未完了, 完了] のタスク数（カテゴリなしは "none"）
+        overdue_count: overdue_as_of 時点で期限を過ぎた未完了のタスク数
+        overdue_as_of: overdue_count を数えた日時
+        next_due_at: overdue_as_of 以降で最も早い未完了タスクの期限
+        overdue_stale: 期限切れの件数を数え直す必要があるか
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    open_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    open_high = models.IntegerField(default=0)
+    open_medium = models.IntegerField(default=0)
+    open_low = models.IntegerField(default=0)
+    by_category = models.JSONField(default=dict)
+    overdue_count = models.IntegerField(default=0)
+    overdue_as_of = models.DateTimeField(default=timezone.now)
+    next_due_at = models.DateTimeField(null=True, blank=True)
+    overdue_stale = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f'{self.user} （未完了: {self.open_count} / 完了: {self.completed_count}）'
+
+
+class TaskReminder(models.Model):
+    """送信済みのリマインダー
+
+    同じタスク・種類・期限のリマインダーを二度送らないために記録する。
+    期限が変更された場合は、新しい期限のリマインダーを改めて送る。
+
+    Attributes:
+        task: リマインダーを送ったタスク
+        kind: 'due_soon'（期限が近い）または 'overdue'（期限切れ）
+        due_date: 送ったときのタスクの期限
+        sent_at: 送信日時
+    """
+    KIND_CHOICES = [
+        ('due_soon', '期限が近い'),
+        ('overdue', '期限切れ'),
+    ]
+
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='reminders')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    due_date = models.DateTimeField()
+    sent_at = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
-        return f'{self.title} （期限: {self.due_date}）'
\ No newline at end of file
+        return f'{self.task_id} {self.get_kind_display()} （期限: {self.due_date}）'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'kind', 'due_date'], name='task_reminder_unique'),
+        ]
+
+
+class ArchivedTask(models.Model):
+    """アーカイブした完了済みのタスク
+
+    完了してから時間の経ったタスクを todo_task から移し（todo.archive.archive_tasks）、
+    一覧の絞り込み・件数・検索が読む表を小さく保つ。主キーは元のタスクのものを使うため、
+    未完了に戻すと同じIDのタスクとして todo_task に戻る（todo.archive.restore_tasks）。
+    一覧と同じクエリで読めるよう、列の名前と順序は Task と同じにする。
+
+    Attributes:
+        archived_at: アーカイブした日時（ほかの列は Task と同じ）
+    """
+    PRIORITY_CHOICES = Task.PRIORITY_CHOICES
+
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    created_date = models.DateTimeField()
+    due_date = models.DateTimeField(null=True, blank=True)
+    completed = models.BooleanField(default=True)
+    category = models.ForeignKey(
+        Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_tasks',
+    )
+    priority = PriorityField(choices=PRIORITY_CHOICES, default='medium')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_tasks')
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    archived = True
+
+    def __str__(self):
+        return f'{self.title} （アーカイブ: {self.archived_at}）'
+
+    class Meta:
+        # 一覧の並び替え（作成日時 / 期限 / 優先度）をユーザーごとに処理する
+        indexes = [
+            models.Index(fields=['user', 'created_date'], name='archived_user_created_idx'),
+            models.Index(fields=['user', 'due_date'], name='archived_user_due_idx'),
+            models.Index(fields=['user', 'priority'], name='archived_user_priority_idx'),
+        ]
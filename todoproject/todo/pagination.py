@@ -0,0 +1,301 @@
+import base64
+import binascii
+import datetime
+import json
+from collections.abc import Sequence
+from functools import cmp_to_key
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """日時をマイクロ秒まで残してエンコードする
+
+    DjangoJSONEncoder はミリ秒に丸めるため、そのままでは同じ値の比較が崩れる。
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class InvalidCursor(Exception):
+    """カーソル文字列が壊れている、または現在の並び順と一致しない"""
+
+
+class KeysetPage(Sequence):
+    """キーセットページネーションの1ページ分
+
+    django.core.paginator.Page と同じ has_next / has_previous /
+    has_other_pages を持つが、総件数やページ番号は持たない。
+
+    Attributes:
+        object_list: このページのオブジェクト
+        next_cursor: 次ページのカーソル（次ページがない場合は None）
+        previous_cursor: 前ページのカーソル（先頭ページへ戻る場合は None）
+    """
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = None
+        self.previous_cursor = None
+        if object_list and has_next:
+            self.next_cursor = paginator.encode_cursor(object_list[-1], 'next')
+        if object_list and has_previous:
+            self.previous_cursor = paginator.encode_cursor(object_list[0], 'prev')
+
+    def __repr__(self):
+        return f'<KeysetPage ({len(self.object_list)} items)>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class KeysetPaginator:
+    """並び順の列 + 主キーをキーにしたカーソル方式のページネーション
+
+    OFFSET と COUNT(*) を使わず、直前のページの端の行の値より後（前）の行を
+    LIMIT で取得する。クエリセットの並び順は最後の要素が 'pk' または '-pk'
+    である必要がある（sort_tasks が付与する）。
+
+    Args:
+        queryset (QuerySet): order_by済みのクエリセット
+        per_page (int): 1ページあたりの件数
+    """
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = self._parse_ordering(queryset.query.order_by)
+        self.nulls_largest = connections[queryset.db].features.nulls_order_largest
+
+    @staticmethod
+    def _parse_ordering(order_by):
+        ordering = []
+        for item in order_by:
+            if not isinstance(item, str):
+                raise ValueError('KeysetPaginator は文字列の並び順のみ扱える')
+            ordering.append((item.lstrip('-'), item.startswith('-')))
+        if not ordering or ordering[-1][0] not in ('pk', 'id'):
+            raise ValueError('KeysetPaginator の並び順は主キーで終わる必要がある')
+        return ordering
+
+    @property
+    def ordering_key(self):
+        return ','.join(('-' if desc else '') + name for name, desc in self.ordering)
+
+    def _value(self, obj, name):
+        if isinstance(obj, dict):
+            return obj[name]
+        return getattr(obj, name)
+
+    def encode_cursor(self, obj, direction):
+        payload = {
+            'o': self.ordering_key,
+            'd': direction,
+            'v': [self._value(obj, name) for name, _ in self.ordering],
+        }
+        data = json.dumps(payload, cls=CursorEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """カーソル文字列を (方向, 値のリスト) に復元する
+
+        Raises:
+            InvalidCursor: カーソルが壊れている、または並び順が一致しない場合
+        """
+        try:
+            data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            payload = json.loads(data)
+            direction, raw_values = payload['d'], payload['v']
+            if payload['o'] != self.ordering_key or direction not in ('next', 'prev'):
+                raise InvalidCursor(cursor)
+            if len(raw_values) != len(self.ordering):
+                raise InvalidCursor(cursor)
+            values = [self._to_python(name, value) for (name, _), value in zip(self.ordering, raw_values)]
+        except (binascii.Error, ValueError, TypeError, KeyError, ValidationError) as e:
+            raise InvalidCursor(cursor) from e
+        return direction, values
+
+    def _field(self, name):
+        model = self.queryset.model
+        try:
+            return model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # アノテーション（検索ランクなど）
+            return None
+
+    def _to_python(self, name, value):
+        field = self._field(name)
+        if value is None or field is None:
+            return value
+        return field.to_python(value)
+
+    def _nulls_last(self, name, desc):
+        """NULLの行が走査の末尾に来るか（昇順でNULLが最大、または降順でNULLが最小）"""
+        field = self._field(name)
+        if field is not None and not field.null:
+            return False
+        return self.nulls_largest != desc
+
+    def _after(self, name, desc, value):
+        """走査順で value より後ろに来る行の条件（該当なしの場合は None）"""
+        nulls_last = self._nulls_last(name, desc)
+        if value is None:
+            return None if nulls_last else Q(**{f'{name}__isnull': False})
+        condition = Q(**{f'{name}__{"lt" if desc else "gt"}': value})
+        if nulls_last:
+            condition |= Q(**{f'{name}__isnull': True})
+        return condition
+
+    @staticmethod
+    def _equal(name, value):
+        if value is None:
+            return Q(**{f'{name}__isnull': True})
+        return Q(**{name: value})
+
+    def _seek(self, ordering, values):
+        """(列1, 列2, ..., pk) の辞書順で values より後ろの行の条件"""
+        condition = Q(pk__in=[])
+        prefix = Q()
+        for (name, desc), value in zip(ordering, values):
+            after = self._after(name, desc, value)
+            if after is not None:
+                condition |= prefix & after
+            prefix &= self._equal(name, value)
+        # 先頭列の範囲条件を明示し、インデックスの範囲検索として使えるようにする
+        name, desc = ordering[0]
+        if values[0] is not None and not self._nulls_last(name, desc):
+            condition &= Q(**{f'{name}__{"lte" if desc else "gte"}': values[0]})
+        return condition
+
+    def _page_query(self, cursor, queryset=None):
+        """カーソルから (方向, カーソルの値, per_page + 1件を取るクエリセット) を作る
+
+        queryset を渡すと self.queryset の代わりに使う（並び順は同じである必要がある）。
+        """
+        direction, values = 'next', None
+        if cursor:
+            try:
+                direction, values = self.decode_cursor(cursor)
+            except InvalidCursor:
+                direction, values = 'next', None
+
+        ordering = self.ordering
+        queryset = self.queryset if queryset is None else queryset
+        if direction == 'prev':
+            ordering = [(name, not desc) for name, desc in ordering]
+            queryset = queryset.order_by(*[('-' if desc else '') + name for name, desc in ordering])
+        if values is not None:
+            queryset = queryset.filter(self._seek(ordering, values))
+        return direction, values, queryset[:self.per_page + 1]
+
+    def _make_page(self, rows, direction, values):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == 'prev':
+            rows.reverse()
+            return KeysetPage(rows, self, has_next=True, has_previous=has_more)
+        return KeysetPage(rows, self, has_next=has_more, has_previous=values is not None)
+
+    def get_page(self, cursor=None):
+        """カーソルが指すページを返す
+
+        不正なカーソルや並び順が変わったカーソルは先頭ページとして扱う。
+
+        Args:
+            cursor (str): encode_cursor で作ったカーソル
+
+        Returns:
+            KeysetPage: 取得したページ
+        """
+        direction, values, queryset = self._page_query(cursor)
+        return self._make_page(list(queryset), direction, values)
+
+    async def aget_page(self, cursor=None):
+        """get_page の非同期版（非同期ORMで読み込む）"""
+        direction, values, queryset = self._page_query(cursor)
+        return self._make_page([row async for row in queryset], direction, values)
+
+
+class MergedKeysetPaginator(KeysetPaginator):
+    """同じ並び順の複数のクエリセット（別のテーブル）を1つの並びとしてページネーションする
+
+    それぞれのクエリセットでカーソルより後ろの行を per_page + 1 件ずつ取得し、
+    Pythonで並び順に従ってマージする。どのクエリセットもカーソルとLIMITで
+    インデックスの範囲検索になるため、1ページのクエリはクエリセットの数だけで済む。
+
+    Args:
+        querysets (list[QuerySet]): order_by済みのクエリセット（並び順と列の名前は同じ）
+        per_page (int): 1ページあたりの件数
+    """
+
+    def __init__(self, querysets, per_page):
+        super().__init__(querysets[0], per_page)
+        self.querysets = list(querysets)
+        for queryset in self.querysets[1:]:
+            if self._parse_ordering(queryset.query.order_by) != self.ordering:
+                raise ValueError('MergedKeysetPaginator のクエリセットは同じ並び順である必要がある')
+
+    def _db_value(self, obj, name):
+        """並び替えに使うデータベース側の値（優先度は文字列ではなく順位で比べる）"""
+        value = self._value(obj, name)
+        field = self._field(name)
+        if value is None or field is None:
+            return value
+        return field.get_prep_value(value)
+
+    def _compare(self, ordering):
+        # SQLの ORDER BY と同じ順になるよう、データベースに保存する値で比べる
+        def compare(a, b):
+            for name, desc in ordering:
+                x, y = self._db_value(a, name), self._db_value(b, name)
+                if x == y:
+                    continue
+                if x is None or y is None:
+                    # NULLは nulls_largest なら最大の値として並ぶ
+                    result = 1 if (x is None) == self.nulls_largest else -1
+                else:
+                    result = -1 if x < y else 1
+                return -result if desc else result
+            return 0
+        return cmp_to_key(compare)
+
+    def _merge(self, direction, parts):
+        ordering = self.ordering
+        if direction == 'prev':
+            ordering = [(name, not desc) for name, desc in ordering]
+        rows = [row for part in parts for row in part]
+        rows.sort(key=self._compare(ordering))
+        return rows[:self.per_page + 1]
+
+    def get_page(self, cursor=None):
+        queries = [self._page_query(cursor, queryset) for queryset in self.querysets]
+        direction, values, _ = queries[0]
+        rows = self._merge(direction, [list(queryset) for _, _, queryset in queries])
+        return self._make_page(rows, direction, values)
+
+    async def aget_page(self, cursor=None):
+        queries = [self._page_query(cursor, queryset) for queryset in self.querysets]
+        direction, values, _ = queries[0]
+        rows = self._merge(direction, [[row async for row in queryset] for _, _, queryset in queries])
+        return self._make_page(rows, direction, values)
@@ -0,0 +1,286 @@
+"""
+期限が近いタスクと期限切れのタスクのリマインダー
+
+全ユーザーの未完了タスクを (completed, due_date) のインデックスの範囲検索1本で
+期限順に走査し、キーセット方式のバッチで処理する（ユーザーごとのループはしない）。
+送ったリマインダーは TaskReminder に記録し、再実行しても同じリマインダーは送らない。
+
+送信先（シンク）は settings.TODO_REMINDER_SINK のクラスで差し替えられる。
+シンクは send(reminders) を持つクラスで、reminders は Reminder のリスト。
+"""
+
+import datetime
+import json
+import logging
+import time
+import urllib.request
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import send_mass_mail
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Case, Exists, OuterRef, Value, When
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task, TaskReminder
+from .pagination import KeysetPaginator
+
+logger = logging.getLogger('todo.reminders')
+
+# 1件分のリマインダー（kind は 'due_soon' または 'overdue'）
+Reminder = namedtuple('Reminder', ['task_id', 'user_id', 'title', 'due_date', 'kind'])
+
+# 期限が近いとみなす時間と、期限切れを通知する期間（これより前に期限が切れたタスクは走査しない）
+DEFAULT_WINDOW = datetime.timedelta(hours=24)
+DEFAULT_OVERDUE_LOOKBACK = datetime.timedelta(days=7)
+
+# 1バッチで読むタスク数
+REMINDER_BATCH_SIZE = 1000
+
+# リマインダーの処理で読む列
+REMINDER_FIELDS = ('pk', 'user_id', 'title', 'due_date')
+
+
+class LogSink:
+    """リマインダーを 'todo.reminders' ロガーに出す（既定のシンク）"""
+
+    def send(self, reminders):
+        for reminder in reminders:
+            logger.info(json.dumps({
+                'task': reminder.task_id,
+                'user': reminder.user_id,
+                'kind': reminder.kind,
+                'title': reminder.title,
+                'due_date': reminder.due_date.isoformat(),
+            }, ensure_ascii=False))
+
+
+class EmailSink:
+    """ユーザーごとに1通のメールにまとめ、EMAIL_BACKEND で送る（メールアドレスのないユーザーは送らない）"""
+
+    subjects = {'due_soon': '期限が近いタスク', 'overdue': '期限切れのタスク'}
+
+    def send(self, reminders):
+        by_user = defaultdict(list)
+        for reminder in reminders:
+            by_user[reminder.user_id].append(reminder)
+        emails = dict(
+            User.objects.filter(pk__in=by_user).exclude(email='').values_list('pk', 'email')
+        )
+        messages = []
+        for user_id, user_reminders in by_user.items():
+            if user_id not in emails:
+                continue
+            lines = [
+                f'[{self.subjects[r.kind]}] {r.title} （期限: {timezone.localtime(r.due_date):%Y-%m-%d %H:%M}）'
+                for r in user_reminders
+            ]
+            messages.append(('タスクのリマインダー', '\n'.join(lines), None, [emails[user_id]]))
+        send_mass_mail(messages, fail_silently=False)
+
+
+class WebhookSink:
+    """リマインダーのJSONを settings.TODO_REMINDER_WEBHOOK_URL にPOSTする（バッチごとに1回）
+
+    送信に失敗した場合は例外を送出し、そのバッチは送信済みとして記録しない（次回の実行で再送する）。
+    """
+
+    timeout = 10
+
+    def __init__(self, url=None):
+        self.url = url or settings.TODO_REMINDER_WEBHOOK_URL
+
+    def payload(self, reminders):
+        return {
+            'reminders': [
+                {**reminder._asdict(), 'due_date': reminder.due_date.isoformat()}
+                for reminder in reminders
+            ],
+        }
+
+    def send(self, reminders):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(self.payload(reminders), ensure_ascii=False).encode(),
+            headers={'Content-Type': 'application/json'},
+            method='POST',
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class MemorySink:
+    """送ったリマインダーをリストに残す（テストと --dry-run 用）"""
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, reminders):
+        self.sent.extend(reminders)
+
+
+def get_sink(path=None):
+    """シンクのクラスのパス（省略時は settings.TODO_REMINDER_SINK）からシンクを作る"""
+    return import_string(path or settings.TODO_REMINDER_SINK)()
+
+
+class ReminderResult:
+    """リマインダーの処理の結果
+
+    Attributes:
+        scanned: 読み込んだ（送信済みでない）タスク数
+        sent: 送ったリマインダー数
+        batches: 処理したバッチ数
+        elapsed: かかった秒数
+        finished: 範囲の最後まで処理したか（時間の上限で止めた場合は False）
+    """
+
+    def __init__(self):
+        self.scanned = 0
+        self.sent = 0
+        self.batches = 0
+        self.elapsed = 0.0
+        self.finished = False
+
+
+class ReminderEngine:
+    """期限が [now - overdue_lookback, now + window) の未完了タスクにリマインダーを送る
+
+    期限が now より前なら 'overdue'、now 以降なら 'due_soon'。
+    バッチごとに「送信済みを除いたタスクの読み込み」「記録」の2クエリで処理し、
+    記録と送信は1つのトランザクションで行う（送信に失敗したバッチは記録しない）。
+    同時に動いている別のワーカーが先に記録したリマインダーは送らない。
+    送信の直後に処理が止まった場合は次の実行で同じリマインダーを再送することがある。
+    時間の上限で止めた場合は、次の実行で送信済みのタスクを除いた続きから処理する。
+
+    Args:
+        sink: send(reminders) を持つシンク
+        now (datetime): 基準日時（省略時は現在）
+        window (timedelta): 期限が近いとみなす時間
+        overdue_lookback (timedelta): 期限切れを通知する期間
+        batch_size (int): 1バッチで読むタスク数
+        time_budget (float): 処理時間の上限（秒）。超えたらバッチの区切りで止める
+        record (bool): 送信済みとして記録するか（偽なら送信も記録もせず数えるだけ）
+    """
+
+    def __init__(self, sink, now=None, window=DEFAULT_WINDOW, overdue_lookback=DEFAULT_OVERDUE_LOOKBACK,
+                 batch_size=REMINDER_BATCH_SIZE, time_budget=None, record=True):
+        self.sink = sink
+        self.now = now or timezone.now()
+        self.window = window
+        self.overdue_lookback = overdue_lookback
+        self.batch_size = max(1, int(batch_size))
+        self.time_budget = time_budget
+        self.record = record
+
+    def kind(self):
+        """タスクの期限から決まるリマインダーの種類（SQLの式）"""
+        return Case(When(due_date__lt=self.now, then=Value('overdue')), default=Value('due_soon'))
+
+    def queryset(self):
+        """走査するタスク（期限、主キーの順）
+
+        送信済みのリマインダーはSQLの中で除く（(task, kind, due_date) の一意制約のインデックスを引く）。
+        時間の上限で止めた後の再実行でも、送信済みの行をPythonに読み込まない。
+        """
+        sent = TaskReminder.objects.filter(task=OuterRef('pk'), kind=self.kind(), due_date=OuterRef('due_date'))
+        return (
+            Task.objects
+            # Valueで包んで "completed = %s" の比較にし、(completed, due_date) のインデックスの等価条件にする
+            .filter(
+                completed=Value(False),
+                due_date__gte=self.now - self.overdue_lookback,
+                due_date__lt=self.now + self.window,
+            )
+            .exclude(Exists(sent))
+            .order_by('due_date', 'pk')
+            .values(*REMINDER_FIELDS)
+        )
+
+    def reminder(self, row):
+        kind = 'overdue' if row['due_date'] < self.now else 'due_soon'
+        return Reminder(row['pk'], row['user_id'], row['title'], row['due_date'], kind)
+
+    def claim(self, reminders):
+        """リマインダーを送信済みとして記録し、この実行で記録できたものだけを返す
+
+        同時に動いている別のワーカーが記録済みのもの（一意制約に反するもの）は除く。
+        1バッチの中でタスクは重複しないため、記録できたかはタスクの主キーで判定する。
+        """
+        records = [
+            TaskReminder(task_id=r.task_id, kind=r.kind, due_date=r.due_date, sent_at=self.now)
+            for r in reminders
+        ]
+        connection = connections[TaskReminder.objects.db]
+        if connection.vendor in ('sqlite', 'postgresql') and connection.features.can_return_rows_from_bulk_insert:
+            # INSERT ... ON CONFLICT DO NOTHING RETURNING は挿入した行だけを返す
+            qn = connection.ops.quote_name
+            opts = TaskReminder._meta
+            fields = [opts.get_field(name) for name in ('task', 'kind', 'due_date', 'sent_at')]
+            columns = ', '.join(qn(field.column) for field in fields)
+            placeholders = '(' + ', '.join(['%s'] * len(fields)) + ')'
+            # パラメータ数の上限（古いSQLiteでは999）を超えないよう、bulk_create と同じ件数ずつ挿入する
+            batch_size = max(connection.ops.bulk_batch_size(fields, records), 1)
+            claimed = set()
+            with connection.cursor() as cursor:
+                for start in range(0, len(records), batch_size):
+                    batch = records[start:start + batch_size]
+                    params = [
+                        field.get_db_prep_save(getattr(record, field.attname), connection)
+                        for record in batch for field in fields
+                    ]
+                    cursor.execute(
+                        f'INSERT INTO {qn(opts.db_table)} ({columns}) VALUES {", ".join([placeholders] * len(batch))} '
+                        f'ON CONFLICT DO NOTHING RETURNING {qn(fields[0].column)}',
+                        params,
+                    )
+                    claimed.update(row[0] for row in cursor.fetchall())
+        else:
+            # RETURNING に対応しないデータベースでは1件ずつ記録する
+            claimed = set()
+            for record in records:
+                try:
+                    with transaction.atomic():
+                        record.save(force_insert=True)
+                except IntegrityError:
+                    continue
+                claimed.add(record.task_id)
+        return [r for r in reminders if r.task_id in claimed]
+
+    def process(self, rows, result):
+        reminders = [self.reminder(row) for row in rows]
+        if not reminders:
+            return
+        if self.record:
+            with transaction.atomic():
+                # 別のワーカーが先に記録したリマインダーは、そのワーカーが送る
+                reminders = self.claim(reminders)
+                if reminders:
+                    self.sink.send(reminders)
+        result.sent += len(reminders)
+
+    def run(self):
+        """範囲の最後まで、または時間の上限までリマインダーを送る
+
+        Returns:
+            ReminderResult: 処理の結果
+        """
+        result = ReminderResult()
+        start = time.perf_counter()
+        paginator = KeysetPaginator(self.queryset(), self.batch_size)
+        cursor = None
+        while True:
+            page = paginator.get_page(cursor)
+            result.batches += 1
+            result.scanned += len(page)
+            self.process(page.object_list, result)
+            cursor = page.next_cursor
+            if cursor is None:
+                result.finished = True
+                break
+            if self.time_budget is not None and time.perf_counter() - start >= self.time_budget:
+                break
+        result.elapsed = time.perf_counter() - start
+        return result
@@ -0,0 +1,119 @@
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+# タスクのタイトルと説明を索引するFTS5仮想テーブル（SQLiteのみ）
+FTS_TABLE = 'todo_task_fts'
+
+# trigramトークナイザは3文字未満の語を索引できないため、それより短い検索語は部分一致で探す
+MIN_QUERY_LENGTH = 3
+
+# FTS5の外部コンテンツテーブルとして todo_task を参照し、トリガーで同期する。
+# trigramトークナイザは空白で区切られない日本語も3文字単位で索引できる
+INSTALL_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description,
+        content='todo_task', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON todo_task BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON todo_task BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description ON todo_task BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+UNINSTALL_SQL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def is_supported(using='default'):
+    """全文検索インデックスを使えるデータベースか"""
+    return connections[using].vendor == 'sqlite'
+
+
+def install(connection):
+    """FTS5テーブルと同期用トリガーを作成する（作成済みなら何もしない）
+
+    SQLiteでテーブルを作り直すマイグレーションはトリガーを削除するため、
+    post_migrate でも呼び出してトリガーを復元する。
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for sql in INSTALL_SQL:
+            cursor.execute(sql)
+
+
+def uninstall(connection):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for sql in UNINSTALL_SQL:
+            cursor.execute(sql)
+
+
+def rebuild(connection):
+    """todo_task の内容からFTS5インデックスを作り直す"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def match_expression(query):
+    """検索語をFTS5のフレーズ検索式にする（演算子として解釈させない）"""
+    return '"{}"'.format(query.replace('"', '""'))
+
+
+def uses_index(query, using='default'):
+    """この検索語を全文検索インデックスで処理できるか"""
+    return is_supported(using) and len(query.strip()) >= MIN_QUERY_LENGTH
+
+
+def search_tasks(tasks, query):
+    """タスクのクエリセットをタイトルと説明で検索する
+
+    全文検索インデックスを使える場合は検索ランクを 'search_rank' として
+    エイリアスする（値が小さいほど関連度が高い）。ランクは一致した行ごとに
+    相関サブクエリで計算するため、関連度順に並べ替えたときだけSQLに含まれる。
+
+    Args:
+        tasks (QuerySet): 検索前のタスククエリセット
+        query (str): 検索語
+
+    Returns:
+        QuerySet: 検索後のタスククエリセット
+    """
+    if not uses_index(query, tasks.db):
+        return tasks.filter(Q(title__icontains=query) | Q(description__icontains=query))
+    match = match_expression(query.strip())
+    return tasks.filter(
+        pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]),
+    ).alias(
+        search_rank=RawSQL(
+            f'SELECT rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = todo_task.id',
+            [match],
+            output_field=FloatField(),
+        ),
+    )
@@ -0,0 +1,190 @@
+"""
+性能計測用の合成データ（ユーザー・カテゴリ・タスク）を作る
+
+同じ乱数のシードからは同じデータを作るため、計測結果を比べられる。
+"""
+
+import datetime
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedTask, Category, Task, TaskReminder
+from .signals import tasks_changed
+from .stats import rebuild
+
+JA_WORDS = [
+    '会議', '資料', '作成', '確認', '報告書', '打ち合わせ', '請求書', '見積もり', '買い物',
+    '掃除', '予約', '提出', 'レビュー', '企画', '議事録', '連絡', '準備', '整理', '更新', '調査',
+]
+EN_WORDS = [
+    'meeting', 'report', 'invoice', 'review', 'draft', 'email', 'deploy', 'budget', 'schedule',
+    'customer', 'release', 'backup', 'design', 'proposal', 'research', 'update', 'cleanup', 'call',
+]
+
+# 合成データのカテゴリ（システム用の名前, 表示名, 色）と選ばれる割合
+SEED_CATEGORIES = [
+    (('work', '仕事', '#007bff'), 0.35),
+    (('private', '個人', '#28a745'), 0.2),
+    (('shopping', '買い物', '#ffc107'), 0.15),
+    (('study', '勉強', '#17a2b8'), 0.1),
+    (('health', '健康', '#dc3545'), 0.05),
+]
+# カテゴリなしの割合
+NO_CATEGORY_WEIGHT = 0.15
+
+PRIORITY_WEIGHTS = {'low': 0.3, 'medium': 0.5, 'high': 0.2}
+
+# 期限なしの割合と、期限を付ける範囲（今日からの日数）
+NO_DUE_DATE_RATIO = 0.3
+DUE_DAYS_MIN, DUE_DAYS_MODE, DUE_DAYS_MAX = -30, 7, 60
+
+# 説明が空のタスクの割合
+EMPTY_DESCRIPTION_RATIO = 0.4
+
+
+def random_text(rng, words):
+    """日本語（区切りなし）または英語（空白区切り）の単語を words 個並べる"""
+    if rng.random() < 0.5:
+        return ''.join(rng.choices(JA_WORDS, k=words))
+    return ' '.join(rng.choices(EN_WORDS, k=words))
+
+
+def ensure_categories():
+    """合成データのカテゴリを作り（作成済みなら再利用し）、主キーと割合のリストを返す
+
+    Returns:
+        list: [(カテゴリの主キー または None, 割合), ...]
+    """
+    weights = []
+    for (name, display_name, color), weight in SEED_CATEGORIES:
+        category, _ = Category.objects.get_or_create(
+            name=name, defaults={'display_name': display_name, 'color': color},
+        )
+        weights.append((category.pk, weight))
+    weights.append((None, NO_CATEGORY_WEIGHT))
+    return weights
+
+
+class TaskGenerator:
+    """現実に近い分布のタスクを作る（保存はしない）
+
+    - 優先度は 中 > 低 > 高 の順に多い
+    - 期限は3割がなし、残りは過去30日〜60日先（1週間後が最も多い）の勤務時間内
+    - 期限を過ぎたタスクほど完了している割合が高い
+    - タイトルは2〜5語、説明は4割が空で残りは5〜40語
+
+    Args:
+        rng (random.Random): 乱数生成器
+        categories (list): ensure_categories の結果
+        now (datetime): 期限の基準日時
+    """
+
+    def __init__(self, rng, categories, now=None):
+        self.rng = rng
+        self.category_ids = [pk for pk, _ in categories]
+        self.category_weights = [weight for _, weight in categories]
+        self.priorities = list(PRIORITY_WEIGHTS)
+        self.priority_weights = list(PRIORITY_WEIGHTS.values())
+        self.today = timezone.localtime(now or timezone.now()).replace(minute=0, second=0, microsecond=0)
+
+    def due_date(self):
+        if self.rng.random() < NO_DUE_DATE_RATIO:
+            return None
+        days = round(self.rng.triangular(DUE_DAYS_MIN, DUE_DAYS_MAX, DUE_DAYS_MODE))
+        return self.today.replace(hour=self.rng.randint(9, 18)) + datetime.timedelta(days=days)
+
+    def completed(self, due_date):
+        if due_date is None:
+            return self.rng.random() < 0.3
+        if due_date < self.today:
+            return self.rng.random() < 0.7
+        return self.rng.random() < 0.1
+
+    def task(self, user):
+        rng = self.rng
+        due_date = self.due_date()
+        description = ''
+        if rng.random() >= EMPTY_DESCRIPTION_RATIO:
+            description = random_text(rng, rng.randint(5, 40))
+        return Task(
+            title=random_text(rng, rng.randint(2, 5)),
+            description=description,
+            due_date=due_date,
+            completed=self.completed(due_date),
+            priority=rng.choices(self.priorities, self.priority_weights)[0],
+            category_id=rng.choices(self.category_ids, self.category_weights)[0],
+            user=user,
+        )
+
+
+def seed_users(prefix, count, password=None):
+    """{prefix}0000 〜 の名前のユーザーを count 人用意する（作成済みなら再利用する）
+
+    パスワードのハッシュ計算は遅いため、全員に同じハッシュを使う。
+    password を省略するとログインできないユーザーになる（計測ではforce_loginを使う）。
+
+    Returns:
+        list[User]: ユーザー名順のユーザー
+    """
+    usernames = [f'{prefix}{i:04d}' for i in range(count)]
+    existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+    hashed = make_password(password)
+    User.objects.bulk_create([
+        User(username=username, password=hashed)
+        for username in usernames if username not in existing
+    ])
+    return list(User.objects.filter(username__in=usernames).order_by('username'))
+
+
+def seed_tasks(user, count, categories, seed=0, batch_size=5000):
+    """ユーザーのタスクが count 件になるまで合成データを追加する
+
+    batch_size 件ずつ bulk_create で保存し、最後に件数の集計行を作り直して
+    一覧のキャッシュと最終変更日時を更新する。
+
+    Args:
+        user (User): タスクの所有者
+        count (int): ユーザーのタスク数の目標（アーカイブしたタスクも数える）
+        categories (list): ensure_categories の結果
+        seed (int): 乱数のシード（ユーザーと既存の件数を合わせて使う）
+        batch_size (int): 1回の bulk_create で保存する件数
+
+    Returns:
+        int: 追加したタスク数
+    """
+    existing = Task.objects.filter(user=user).count() + ArchivedTask.objects.filter(user=user).count()
+    missing = count - existing
+    if missing <= 0:
+        return 0
+    generator = TaskGenerator(random.Random(f'{seed}:{user.username}:{existing}'), categories)
+    for offset in range(0, missing, batch_size):
+        with transaction.atomic():
+            Task.objects.bulk_create([generator.task(user) for _ in range(min(batch_size, missing - offset))])
+    with transaction.atomic():
+        rebuild(user.pk)
+    tasks_changed(user.pk)
+    return missing
+
+
+def delete_users(users):
+    """ユーザーとそのタスク（アーカイブしたタスクを含む）を削除する
+
+    タスクごとのシグナル（件数の更新・最終変更日時・配信）を送らず、1回のDELETE文で削除する。
+    件数の集計行と最終変更日時はユーザーと一緒に消える。
+
+    Args:
+        users (QuerySet): 削除するユーザーのクエリセット
+
+    Returns:
+        int: 削除したタスク数
+    """
+    with transaction.atomic():
+        TaskReminder.objects.filter(task__user__in=users).delete()
+        deleted = Task.objects.filter(user__in=users)._raw_delete(Task.objects.db)
+        deleted += ArchivedTask.objects.filter(user__in=users)._raw_delete(ArchivedTask.objects.db)
+        users.delete()
+    return deleted
@@ -0,0 +1,116 @@
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_out
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .caches import category_cache, task_list_cache, user_cache
+from .db import pin_primary
+from .events import instance_payload, publish
+from .models import Category, Task, TaskWatermark
+from .stats import UNKNOWN, record_changes
+
+
+def tasks_changed(user_id, event=None):
+    """ユーザーのタスクが作成・更新・削除・切り替えされたことを通知する
+
+    Task.save() / delete() ではシグナルから呼ばれる。シグナルを送らない
+    一括更新（QuerySet.update や UPDATE ... RETURNING）の後は呼び出し側で呼ぶ。
+
+    Args:
+        user_id (int): タスクの所有者のユーザーID
+        event (dict): 開いている一覧へ配る変更（todo.events）。
+            省略した場合は一覧を読み直す変更（reload）を配る
+    """
+    task_list_cache.bump(user_id)
+    TaskWatermark.touch(user_id)
+    # 複製に届くまでの間、このユーザーの一覧・詳細を主から読む
+    pin_primary(user_id)
+    publish(user_id, event or {'type': 'reload'})
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, **kwargs):
+    # 管理画面の一括削除（QuerySet.delete）でも呼ばれるようシグナルで受け取る
+    category_cache.invalidate()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    # パスワード・有効フラグ・権限の変更や削除を、キャッシュしたユーザーに反映する
+    user_cache.invalidate(instance.pk)
+
+
+@receiver(user_logged_out)
+def user_logged_out_invalidate(sender, user, **kwargs):
+    if user is not None:
+        user_cache.invalidate(user.pk)
+
+
+def deleted_with_user(origin):
+    """ユーザーの削除に伴うカスケード削除か
+
+    その場合はユーザーの行も削除されるため、ユーザーに紐づく行を作り直してはいけない。
+    """
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is not Task
+
+
+def _loaded_state(instance):
+    # 読み込んだとき（または前回保存したとき）の状態。一部の列しか読んでいない場合は不明
+    state = getattr(instance, '_loaded_state', None)
+    return UNKNOWN if state is None else state
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, **kwargs):
+    before = None if created else _loaded_state(instance)
+    after = instance.state()
+    record_changes(instance.user_id, [(before, after)])
+    instance._loaded_state = after
+    tasks_changed(instance.user_id, {'type': 'create' if created else 'update', 'task': instance_payload(instance)})
+
+
+class _DeleteBatch:
+    """QuerySet.delete()（管理画面の一括削除など）で削除するタスク
+
+    Django はタスクごとに pre_delete と post_delete を送るため、pre_delete で件数を数え、
+    post_delete がすべて届いたところで、件数の反映と変更の通知をユーザーごとに1回だけ行う。
+    """
+
+    def __init__(self):
+        self.pending = 0
+        self.deleted = defaultdict(list)
+
+
+@receiver(pre_delete, sender=Task)
+def task_deleting(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, QuerySet) and origin.model is Task:
+        batch = getattr(origin, '_delete_batch', None)
+        if batch is None:
+            batch = origin._delete_batch = _DeleteBatch()
+        batch.pending += 1
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, origin=None, **kwargs):
+    if origin is not None and deleted_with_user(origin):
+        return
+    batch = getattr(origin, '_delete_batch', None)
+    if batch is None:
+        record_changes(instance.user_id, [(_loaded_state(instance), None)])
+        tasks_changed(instance.user_id, {'type': 'delete', 'ids': [instance.pk]})
+        return
+
+    batch.deleted[instance.user_id].append((instance.pk, _loaded_state(instance)))
+    batch.pending -= 1
+    if batch.pending:
+        return
+    del origin._delete_batch
+    for user_id, rows in batch.deleted.items():
+        record_changes(user_id, [(state, None) for _, state in rows])
+        tasks_changed(user_id, {'type': 'delete', 'ids': [pk for pk, _ in rows]})
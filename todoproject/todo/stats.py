@@ -0,0 +1,203 @@
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from .caches import category_cache
+from .models import ArchivedTask, Task, TaskStats
+
+# カテゴリなしのタスクを数える by_category のキー
+NO_CATEGORY = 'none'
+
+# 変更前の状態が分からない（一部の列だけ読み込んだタスクを保存した）ことを表す
+UNKNOWN = object()
+
+
+def _category_key(category_id):
+    return NO_CATEGORY if category_id is None else str(category_id)
+
+
+def _apply(stats, state, sign):
+    """1件分の状態を sign（+1 / -1）で件数に反映する"""
+    key = _category_key(state.category_id)
+    counts = stats.by_category.setdefault(key, [0, 0])
+    if state.completed:
+        stats.completed_count += sign
+        counts[1] += sign
+    else:
+        stats.open_count += sign
+        counts[0] += sign
+        column = f'open_{state.priority}'
+        setattr(stats, column, getattr(stats, column) + sign)
+        if state.due_date is not None:
+            if state.due_date < stats.overdue_as_of:
+                stats.overdue_count += sign
+            elif sign > 0:
+                if stats.next_due_at is None or state.due_date < stats.next_due_at:
+                    stats.next_due_at = state.due_date
+            elif state.due_date == stats.next_due_at:
+                # 次の期限のタスクがなくなったため、次に読むときに数え直す
+                stats.overdue_stale = True
+    if counts == [0, 0]:
+        del stats.by_category[key]
+
+
+def compute(user_id, as_of=None):
+    """タスク表を集計して TaskStats を作る（保存はしない）
+
+    アーカイブしたタスク（ArchivedTask）も完了済みとして数える。
+
+    Args:
+        user_id (int): ユーザーID
+        as_of (datetime): 期限切れを判定する日時（省略時は現在）
+
+    Returns:
+        TaskStats: 集計した件数
+    """
+    as_of = as_of or timezone.now()
+    stats = TaskStats(user_id=user_id, overdue_as_of=as_of)
+    tasks = Task.objects.filter(user_id=user_id)
+    groups = tasks.order_by().values('completed', 'priority', 'category_id').annotate(n=Count('pk'))
+    for group in groups:
+        key = _category_key(group['category_id'])
+        counts = stats.by_category.setdefault(key, [0, 0])
+        if group['completed']:
+            stats.completed_count += group['n']
+            counts[1] += group['n']
+        else:
+            stats.open_count += group['n']
+            counts[0] += group['n']
+            column = f'open_{group["priority"]}'
+            setattr(stats, column, getattr(stats, column) + group['n'])
+    archived = ArchivedTask.objects.filter(user_id=user_id).order_by().values('category_id').annotate(n=Count('pk'))
+    for group in archived:
+        stats.completed_count += group['n']
+        stats.by_category.setdefault(_category_key(group['category_id']), [0, 0])[1] += group['n']
+    _count_overdue(stats, as_of)
+    return stats
+
+
+def _count_overdue(stats, as_of):
+    # (user, completed, due_date) のインデックスの範囲検索で数える
+    open_tasks = Task.objects.filter(user_id=stats.user_id, completed=False)
+    stats.overdue_count = open_tasks.filter(due_date__lt=as_of).count()
+    stats.next_due_at = open_tasks.filter(due_date__gte=as_of).aggregate(next_due=Min('due_date'))['next_due']
+    stats.overdue_as_of = as_of
+    stats.overdue_stale = False
+
+
+def rebuild(user_id):
+    """ユーザーの件数をタスク表から作り直して保存する"""
+    stats = compute(user_id)
+    stats.save()
+    return stats
+
+
+def record_changes(user_id, changes):
+    """タスクの変更を件数に反映する
+
+    集計行をロックして読み、差分を加えて保存する（集計クエリは発行しない）。
+    集計行がまだない場合は、変更後のタスク表から作る。
+
+    Args:
+        user_id (int): タスクの所有者のユーザーID
+        changes (Iterable[tuple]): (変更前の TaskState, 変更後の TaskState) のリスト。
+            作成は変更前が None、削除は変更後が None。
+            変更前の状態が分からない場合は UNKNOWN を渡すと作り直す。
+    """
+    # タイトルや説明だけの変更は件数に影響しない
+    changes = [(before, after) for before, after in changes if before != after]
+    if not changes:
+        return
+    with transaction.atomic():
+        stats = TaskStats.objects.select_for_update().filter(user_id=user_id).first()
+        if stats is None or any(before is UNKNOWN for before, _ in changes):
+            rebuild(user_id)
+            return
+        for before, after in changes:
+            if before is not None:
+                _apply(stats, before, -1)
+            if after is not None:
+                _apply(stats, after, +1)
+        stats.save()
+
+
+def get_stats(user_id, now=None):
+    """ユーザーの件数を返す
+
+    通常は主キーの検索1回。集計行がない場合は作り、次の期限を過ぎている
+    場合は期限切れの件数だけを数え直す。
+
+    Returns:
+        TaskStats: ユーザーの件数
+    """
+    now = now or timezone.now()
+    stats = TaskStats.objects.filter(user_id=user_id).first()
+    if stats is None:
+        with transaction.atomic():
+            return rebuild(user_id)
+    if stats.overdue_stale or (stats.next_due_at is not None and stats.next_due_at <= now):
+        with transaction.atomic():
+            stats = TaskStats.objects.select_for_update().get(user_id=user_id)
+            _count_overdue(stats, now)
+            stats.save(update_fields=['overdue_count', 'next_due_at', 'overdue_as_of', 'overdue_stale'])
+    return stats
+
+
+def summary(stats):
+    """件数をJSONにできる辞書にする（カテゴリ名はカテゴリキャッシュから引く）"""
+    by_category = {}
+    for key, (open_count, completed_count) in stats.by_category.items():
+        category = None if key == NO_CATEGORY else category_cache.get(key)
+        # 削除されたカテゴリのタスクはカテゴリなしになっている
+        category_id = category.pk if category is not None else None
+        entry = by_category.setdefault(category_id, {
+            'id': category_id,
+            'name': str(category) if category is not None else None,
+            'open': 0,
+            'completed': 0,
+        })
+        entry['open'] += open_count
+        entry['completed'] += completed_count
+    return {
+        'open': stats.open_count,
+        'completed': stats.completed_count,
+        'overdue': stats.overdue_count,
+        'by_priority': {
+            'high': stats.open_high,
+            'medium': stats.open_medium,
+            'low': stats.open_low,
+        },
+        'by_category': [entry for entry in by_category.values() if entry['open'] or entry['completed']],
+        'as_of': stats.overdue_as_of,
+    }
+
+
+def verify(stats):
+    """保存されている件数とタスク表の集計を比べ、異なる項目の辞書を返す
+
+    期限切れは保存されている overdue_as_of の時点で比べる。
+
+    Returns:
+        dict: {項目名: (保存されている値, 集計した値)}（一致すれば空）
+    """
+    expected = compute(stats.user_id, stats.overdue_as_of)
+    fields = ['open_count', 'completed_count', 'open_high', 'open_medium', 'open_low', 'overdue_count']
+    differences = {
+        name: (getattr(stats, name), getattr(expected, name))
+        for name in fields
+        if getattr(stats, name) != getattr(expected, name)
+    }
+    # 削除されたカテゴリの件数はカテゴリなしとして比べる
+    actual_categories = {}
+    for key, counts in stats.by_category.items():
+        if key != NO_CATEGORY and category_cache.get(key) is None:
+            key = NO_CATEGORY
+        merged = actual_categories.setdefault(key, [0, 0])
+        merged[0] += counts[0]
+        merged[1] += counts[1]
+    actual_categories = {key: counts for key, counts in actual_categories.items() if counts != [0, 0]}
+    if actual_categories != expected.by_category:
+        differences['by_category'] = (actual_categories, expected.by_category)
+    if not stats.overdue_stale and stats.next_due_at != expected.next_due_at:
+        differences['next_due_at'] = (stats.next_due_at, expected.next_due_at)
+    return differences
@@ -0,0 +1,14 @@
+from django import template
+
+from ..caches import category_cache
+
+register = template.Library()
+
+
+@register.filter
+def category(category_id):
+    """カテゴリIDからキャッシュ済みのカテゴリを返す（クエリを発行しない）
+
+    使用例: {% with category=task.category_id|category %}
+    """
+    return category_cache.get(category_id)
@@ -1,11 +1,29 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import api, async_views, views
+
+# ASGIで動かす場合は、一覧・詳細・完了状態の切り替えに非同期版のビューを使う
+task_views = async_views if settings.TODO_ASYNC_VIEWS else views
 
 urlpatterns = [
-    path('', views.task_list, name='task_list'),
-    path('task/<int:pk>/', views.task_detail, name='task_detail'),
+    path('', task_views.task_list, name='task_list'),
+    path('task/<int:pk>/', task_views.task_detail, name='task_detail'),
     path('task/new/', views.task_create, name='task_create'),
     path('task/<int:pk>/edit/', views.task_update, name='task_update'),
     path('task/<int:pk>/delete/', views.task_delete, name='task_delete'),
-    path('task/<int:pk>/toggle/', views.task_toggle_complete, name='task_toggle_complete'),
-]
\ No newline at end of file
+    path('task/<int:pk>/toggle/', task_views.task_toggle_complete, name='task_toggle_complete'),
+    path('task/bulk/', views.task_bulk_action, name='task_bulk_action'),
+    path('task/export/', views.task_export, name='task_export'),
+    path('task/import/', views.task_import, name='task_import'),
+    path('task/summary/', views.task_summary, name='task_summary'),
+    path('api/tasks/', api.task_collection, name='api_task_collection'),
+    path('api/tasks/<int:pk>/', api.task_item, name='api_task_item'),
+    path('api/categories/', api.category_collection, name='api_category_collection'),
+    path('monitoring/cache/', views.cache_stats, name='cache_stats'),
+    path('monitoring/metrics/', views.metrics, name='metrics'),
+]
+
+# タスクの変更の配信（Server-Sent Events）は、ASGIで動かす場合だけ登録する
+# （WSGIでは応答をすべて読み終えるまで送れず、接続ごとにワーカーを使い続けるため）
+if settings.TODO_ASYNC_VIEWS:
+    urlpatterns.append(path('events/', async_views.task_events, name='task_events'))
\ No newline at end of file
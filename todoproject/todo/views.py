@@ -1,18 +1,67 @@
+# Standard library imports
+import csv
+import datetime
+import hashlib
+import json
+
 # Django core imports
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib import messages
+from django.core.exceptions import PermissionDenied
 from django.core.paginator import Paginator
-from django.db.models import Q
-from django.http import JsonResponse
+from django.db.models import F, Q, Value
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 from django.utils.http import urlencode
-from django.views.decorators.http import require_POST
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST
 
 # Local imports
-from .models import Task, Category
+from .caches import category_cache, task_list_cache, user_cache
+from .db import read_from_replica
+from .models import ArchivedTask, Task, TaskWatermark
+from .events import get_broker, toggle_event
+from .export import EXPORT_FORMATS, stream_tasks
+from .fields import PRIORITY_RANKS
 from .forms import TaskForm
+from .importer import IMPORT_FORMATS, guess_format, import_tasks
+from .metrics import query_budget, view_metrics
+from .pagination import KeysetPaginator, MergedKeysetPaginator
+from .search import search_tasks
+from .signals import tasks_changed
+from .stats import get_stats, summary
+
+# タスク一覧テーブルで表示に使う列（descriptionなどは読み込まない）
+# カテゴリはcategory_idだけを読み、表示はカテゴリキャッシュから行う
+TASK_LIST_FIELDS = (
+    'title',
+    'due_date',
+    'completed',
+    'priority',
+    'category',
+    # カーソルの値として読む並び替えの列
+    'created_date',
+)
+
+# タスク一覧の1ページあたりの件数
+TASK_LIST_PER_PAGE = 10
+
+# ページ番号のリンクは現在のページの前後と先頭・末尾だけを出す（1 2 … 48 49 50 51 52 … 999 1000）
+PAGE_RANGE_ON_EACH_SIDE = 2
+PAGE_RANGE_ON_ENDS = 2
+
+# 一括操作で受け付ける操作と、1回のリクエストで扱うタスク数の上限
+BULK_ACTIONS = ('toggle', 'complete', 'delete')
+BULK_ACTION_MAX_IDS = 500
+
+# インポート結果の応答に含めるエラー行の最大数
+IMPORT_MAX_ERRORS = 100
 
 def filter_tasks(tasks, category_id, priority, completed, search_query):
     """タスクのクエリセットをフィルタリングする
@@ -30,15 +79,19 @@ def filter_tasks(tasks, category_id, priority, completed, search_query):
     if category_id:
         tasks = tasks.filter(category_id=category_id)
     if priority:
+        if priority not in PRIORITY_RANKS:
+            # 無効な優先度の場合、空のクエリセットを返す
+            return tasks.none()
         tasks = tasks.filter(priority=priority)
     if completed is not None:
         if completed.lower() in ['true', 'false']:
-            tasks = tasks.filter(completed=completed.lower() == 'true')
+            # Valueで包んで "completed = %s" の比較にし、複合インデックスの等価条件として使えるようにする
+            tasks = tasks.filter(completed=Value(completed.lower() == 'true'))
         else:
             # 無効なcompleted値の場合、空のクエリセットを返す
             return tasks.none()
     if search_query:
-        tasks = tasks.filter(Q(title__icontains=search_query) | Q(description__icontains=search_query))
+        tasks = search_tasks(tasks, search_query)
     return tasks
 
 def sort_tasks(tasks, sort_param):
@@ -54,14 +107,233 @@ def sort_tasks(tasks, sort_param):
     sort_mapping = {
         'due_date': 'due_date',
         '-due_date': '-due_date',
+        # 優先度は順位で保存しているため、降順で 高→中→低 になる
         'priority': '-priority',
         '-priority': 'priority',
         'created_date': 'created_date',
         '-created_date': '-created_date'
     }
-    return tasks.order_by(sort_mapping.get(sort_param, '-created_date'))
+    # 全文検索で絞り込んだ場合のみ関連度順（小さいほど関連度が高い）を使える。
+    # カーソルの値として読めるよう、このときだけランクをSELECTに含める
+    if sort_param == 'rank' and 'search_rank' in tasks.query.annotations:
+        tasks = tasks.annotate(relevance=F('search_rank'))
+        sort_mapping['rank'] = 'relevance'
+    ordering = sort_mapping.get(sort_param, '-created_date')
+    # 同じ値の行の順序を固定するため、同じ向きで主キーを第2キーにする
+    tiebreaker = '-pk' if ordering.startswith('-') else 'pk'
+    return tasks.order_by(ordering, tiebreaker)
+
+def task_list_context(params):
+    """タスク一覧のテンプレートに渡す値（一覧のテーブル以外）を作る
+
+    Args:
+        params (dict): task_list_cache.normalize で正規化したGETパラメータ
+
+    Returns:
+        dict: テンプレートのコンテキスト
+    """
+    # 現在のパラメータから'page'と'sort'と'cursor'を除いたもの
+    query_params = {
+        name: value for name, value in params.items()
+        if name not in ('page', 'sort', 'cursor')
+    }
+    return {
+        'categories': category_cache.all(),
+        'current_category': params.get('category'),
+        'current_priority': params.get('priority'),
+        'current_completed': params.get('completed'),
+        'current_archived': params.get('archived') == '1',
+        'current_sort': params.get('sort', '-created_date'),
+        'search_query': params.get('search', ''),
+        'keyset_pagination': settings.TODO_PAGINATION == 'keyset',
+        'query_params': urlencode(query_params),
+        # テンプレートのフラグメントキャッシュ（{% cache %}）の有効期間とキーに含める版数
+        'fragment_cache_timeout': settings.TODO_FRAGMENT_CACHE_TIMEOUT,
+        'category_version': category_cache.version(),
+        # 変更の配信（todo.events）に接続するか（/events/ はASGIで動かす場合だけ登録する）
+        'live_updates': settings.TODO_ASYNC_VIEWS,
+        # 変更の配信（todo.events）で作成されたタスクを先頭に追加できるか
+        # （絞り込みなし・作成日時の新しい順の先頭ページだけ。それ以外は読み直しを促す）
+        'live_insert': params.keys() <= {'sort'} and params.get('sort', '-created_date') == '-created_date',
+        'per_page': TASK_LIST_PER_PAGE,
+        # 追加する行のひな形（主キー 0 をJavaScriptで置き換える）
+        'row_template': Task(pk=0),
+    }
+
+
+def task_list_queryset(user, params):
+    """タスク一覧に表示するタスクのクエリセット（フィルタリング・ソート済み）を作る"""
+    # 一覧に表示する列だけを読み込む（カテゴリはキャッシュから表示するためJOINしない）
+    tasks = Task.objects.filter(user=user).only(*TASK_LIST_FIELDS)
 
+    # タスクのフィルタリングとソート
+    tasks = filter_tasks(
+        tasks, params.get('category'), params.get('priority'), params.get('completed'), params.get('search', ''),
+    )
+    return sort_tasks(tasks, params.get('sort', '-created_date'))
+
+
+def include_archived(params):
+    """アーカイブしたタスクを一覧に含めるか
+
+    完了済みで絞り込み、archived=1 を指定した場合だけ含める。
+    アーカイブは全文検索インデックスに含めないため、関連度順では含めない。
+    """
+    return (
+        params.get('archived') == '1'
+        and params.get('completed', '').lower() == 'true'
+        and params.get('sort') != 'rank'
+    )
+
+
+def archived_list_queryset(user, params):
+    """一覧に含めるアーカイブしたタスクのクエリセット（task_list_queryset と同じ列・並び順）"""
+    tasks = ArchivedTask.objects.filter(user=user).only(*TASK_LIST_FIELDS)
+    tasks = filter_tasks(tasks, params.get('category'), params.get('priority'), params.get('completed'), '')
+    search_query = params.get('search', '')
+    if search_query:
+        # アーカイブは全文検索インデックスに含めないため、部分一致で探す
+        tasks = tasks.filter(Q(title__icontains=search_query) | Q(description__icontains=search_query))
+    return sort_tasks(tasks, params.get('sort', '-created_date'))
+
+
+def task_list_paginator(user, params, keyset):
+    """タスク一覧のページネーター
+
+    アーカイブを含める場合、keysetモードでは2つの表をそれぞれカーソルで読んでマージし、
+    ページ番号のモードでは UNION ALL をまとめて並べ替える（件数は2つの表の合計）。
+
+    Args:
+        user (User): ログインユーザー
+        params (dict): task_list_cache.normalize で正規化したGETパラメータ
+        keyset (bool): キーセットページネーションを使うか
+
+    Returns:
+        KeysetPaginator | Paginator: ページネーター
+    """
+    tasks = task_list_queryset(user, params)
+    archived = archived_list_queryset(user, params) if include_archived(params) else None
+    if keyset:
+        if archived is not None:
+            return MergedKeysetPaginator([tasks, archived], TASK_LIST_PER_PAGE)
+        return KeysetPaginator(tasks, TASK_LIST_PER_PAGE)
+    if archived is not None:
+        # UNIONの行はすべて Task として読むため、アーカイブの行には archived=True を付ける
+        ordering = tasks.query.order_by
+        tasks = (
+            tasks.annotate(archived=Value(False)).order_by()
+            .union(archived.annotate(archived=Value(True)).order_by(), all=True)
+            .order_by(*ordering)
+        )
+    return Paginator(tasks, TASK_LIST_PER_PAGE)
+
+
+def render_task_table(context, page_obj):
+    """タスク一覧のテーブル部分をレンダリングする（キャッシュする単位）"""
+    context = {**context, 'page_obj': page_obj, 'tasks': page_obj}
+    if not context['keyset_pagination']:
+        context['page_range'] = page_obj.paginator.get_elided_page_range(
+            page_obj.number, on_each_side=PAGE_RANGE_ON_EACH_SIDE, on_ends=PAGE_RANGE_ON_ENDS,
+        )
+    return render_to_string('todo/task_list_table.html', context)
+
+
+def _task_watermark(request):
+    """ログインユーザーのタスクの最終変更日時（1リクエストにつき1回だけ読む）"""
+    if not hasattr(request, '_task_watermark'):
+        request._task_watermark = (
+            TaskWatermark.objects.filter(user_id=request.user.pk)
+            .values_list('modified_at', flat=True)
+            .first()
+        )
+    return request._task_watermark
+
+
+def _conditional_etag(request, *parts):
+    """ページの内容を決める値からETagを作る
+
+    ページに埋め込むCSRFトークンとカテゴリ名も内容の一部のため、
+    CSRFクッキーとカテゴリの版数を含める。
+    """
+    parts = (
+        request.user.pk,
+        category_cache.version(),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        *parts,
+    )
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+
+
+def _conditional_enabled(request):
+    # 未ログイン（リダイレクト）や表示待ちのメッセージがある場合は毎回レンダリングする
+    return request.user.is_authenticated and 'messages' not in request.COOKIES
+
+
+def _category_changed_at():
+    # カテゴリの版数は更新時刻（ナノ秒）
+    return datetime.datetime.fromtimestamp(category_cache.version() / 1e9, tz=datetime.timezone.utc)
+
+
+def task_list_etag(request):
+    """タスク一覧のETag（最終変更日時がまだない場合は None）"""
+    if not _conditional_enabled(request):
+        return None
+    watermark = _task_watermark(request)
+    if watermark is None:
+        return None
+    params = task_list_cache.normalize(request.GET)
+    return _conditional_etag(request, watermark, urlencode(params), settings.TODO_PAGINATION)
+
+
+def task_list_last_modified(request):
+    """タスク一覧の最終変更日時（タスクとカテゴリの変更のうち新しいほう）"""
+    if not _conditional_enabled(request):
+        return None
+    watermark = _task_watermark(request)
+    if watermark is None:
+        return None
+    return max(watermark, _category_changed_at())
+
+
+def _task_updated_at(request, pk):
+    """タスクの更新日時（1リクエストにつき1回だけ読む。存在しない場合は None）"""
+    if not hasattr(request, '_task_updated_at'):
+        request._task_updated_at = (
+            Task.objects.filter(pk=pk, user_id=request.user.pk)
+            .values_list('updated_at', flat=True)
+            .first()
+        )
+    return request._task_updated_at
+
+
+def task_detail_etag(request, pk):
+    """タスク詳細のETag（タスクが存在しない場合は None）"""
+    if not _conditional_enabled(request):
+        return None
+    updated_at = _task_updated_at(request, pk)
+    if updated_at is None:
+        return None
+    return _conditional_etag(request, pk, updated_at)
+
+
+def task_detail_last_modified(request, pk):
+    """タスク詳細の最終変更日時（タスクとカテゴリの変更のうち新しいほう）"""
+    if not _conditional_enabled(request):
+        return None
+    updated_at = _task_updated_at(request, pk)
+    if updated_at is None:
+        return None
+    return max(updated_at, _category_changed_at())
+
+
+# 条件付きGET: ブラウザが前回のETag / 更新日時を送ってきて内容が変わっていなければ、
+# 一覧のクエリやテンプレートのレンダリングを行わずに304を返す。
+# no-cache で毎回ブラウザに再検証させる
+@query_budget(6)
 @login_required
+@read_from_replica
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=task_list_etag, last_modified_func=task_list_last_modified)
 def task_list(request):
     """ログインユーザーのタスク一覧を表示する
 
@@ -73,44 +345,33 @@ def task_list(request):
     Returns:
         HttpResponse: レンダリングされたタスク一覧ページ
     """
-    tasks = Task.objects.filter(user=request.user)
-    categories = Category.objects.all()
+    # フィルタリングとソートのパラメータを取得（キャッシュキーと同じ正規化した値を使う）
+    params = task_list_cache.normalize(request.GET)
+    context = task_list_context(params)
+
+    # レンダリング済みのテーブルがキャッシュにあれば、一覧のクエリを発行しない
+    cache_key = task_list_cache.key(request.user.pk, params)
+    task_table = task_list_cache.get(cache_key)
+    if task_table is None:
+        # ページネーション
+        # keysetモードではCOUNT(*)とOFFSETを使わず、カーソルで次/前のページを取得する
+        paginator = task_list_paginator(request.user, params, context['keyset_pagination'])
+        if context['keyset_pagination']:
+            page_obj = paginator.get_page(params.get('cursor'))
+        else:
+            page_obj = paginator.get_page(params.get('page'))
 
-    # フィルタリングとソートのパラメータを取得
-    category_id = request.GET.get('category')
-    priority = request.GET.get('priority')
-    completed = request.GET.get('completed')
-    search_query = request.GET.get('search', '')
-    sort = request.GET.get('sort', '-created_date')
+        task_table = render_task_table(context, page_obj)
+        task_list_cache.set(cache_key, task_table)
 
-    # タスクのフィルタリングとソート
-    tasks = filter_tasks(tasks, category_id, priority, completed, search_query)
-    tasks = sort_tasks(tasks, sort)
-
-    # ページネーション
-    paginator = Paginator(tasks, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-
-    # 現在のGETパラメータを取得し、'page'と'sort'を除去
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    query_params.pop('sort', None)
-
-    context = {
-        'page_obj': page_obj,
-        'tasks': page_obj,
-        'categories': categories,
-        'current_category': category_id,
-        'current_priority': priority,
-        'current_completed': completed,
-        'current_sort': sort,
-        'search_query': search_query,
-        'query_params': urlencode(query_params),
-    }
+    context['task_table'] = task_table
     return render(request, 'todo/task_list.html', context)
 
+@query_budget(5)
 @login_required
+@read_from_replica
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=task_detail_etag, last_modified_func=task_detail_last_modified)
 def task_detail(request, pk):
     """タスクの詳細を表示する
 
@@ -127,6 +388,7 @@ def task_detail(request, pk):
     task = get_object_or_404(Task, pk=pk, user=request.user)
     return render(request, 'todo/task_detail.html', {'task': task})
 
+@query_budget(15)
 @login_required
 def task_create(request):
     """新しいタスクを作成する
@@ -150,6 +412,7 @@ def task_create(request):
         form = TaskForm()
     return render(request, 'todo/task_form.html', {'form': form})
 
+@query_budget(15)
 @login_required
 def task_update(request, pk):
     """既存のタスクを更新する
@@ -176,6 +439,7 @@ def task_update(request, pk):
         form = TaskForm(instance=task)
     return render(request, 'todo/task_form.html', {'form': form})
 
+@query_budget(15)
 @login_required
 def task_delete(request, pk):
     """タスクを削除する
@@ -198,11 +462,14 @@ def task_delete(request, pk):
         return redirect('task_list')
     return render(request, 'todo/task_confirm_delete.html', {'task': task})
 
+@query_budget(15)
 @require_POST
 @login_required
 def task_toggle_complete(request, pk):
     """タスクの完了状態を切り替える
 
+    ユーザーで絞り込んだ1回のUPDATE文で反転し、更新後の値を受け取る。
+
     Args:
         request (HttpRequest): HTTPリクエストオブジェクト
         pk (int): 切り替えるタスクのプライマリーキー
@@ -213,14 +480,174 @@ def task_toggle_complete(request, pk):
     Raises:
         Http404: 指定されたタスクが存在しない場合
     """
-    task = get_object_or_404(Task, pk=pk, user=request.user)
-    task.completed = not task.completed
-    task.save()
+    toggled = Task.objects.toggle_completed(request.user, [pk])
+    if pk not in toggled:
+        raise Http404('タスクが見つかりません')
+    tasks_changed(request.user.pk, toggle_event(toggled))
+    return JsonResponse({
+        'status': 'success',
+        'completed': toggled[pk]
+    })
+
+@require_POST
+@login_required
+def task_bulk_action(request):
+    """複数のタスクをまとめて切り替え・完了・削除する
+
+    リクエストボディはJSONで {"action": "toggle" | "complete" | "delete", "ids": [1, 2, ...]}。
+    他のユーザーのタスクや存在しないIDは無視する。
+
+    Args:
+        request (HttpRequest): HTTPリクエストオブジェクト
+
+    Returns:
+        JsonResponse: 更新したタスクの状態、または削除したタスクのIDを含むJSON応答
+    """
+    try:
+        payload = json.loads(request.body)
+        action = payload['action']
+        ids = [int(pk) for pk in payload['ids']]
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({'status': 'error', 'message': '不正なリクエストです'}, status=400)
+    if action not in BULK_ACTIONS or len(ids) > BULK_ACTION_MAX_IDS:
+        return JsonResponse({'status': 'error', 'message': '不正なリクエストです'}, status=400)
+
+    if action == 'delete':
+        deleted = Task.objects.delete_tasks(request.user, ids)
+        if deleted:
+            tasks_changed(request.user.pk, {'type': 'delete', 'ids': deleted})
+        return JsonResponse({'status': 'success', 'action': action, 'deleted': deleted})
+
+    if action == 'toggle':
+        changed = Task.objects.toggle_completed(request.user, ids)
+    else:
+        changed = Task.objects.complete(request.user, ids)
+    if changed:
+        tasks_changed(request.user.pk, toggle_event(changed))
     return JsonResponse({
         'status': 'success',
-        'completed': task.completed
+        'action': action,
+        'tasks': [{'id': pk, 'completed': completed} for pk, completed in changed.items()],
     })
 
+@login_required
+@read_from_replica
+def task_export(request):
+    """ログインユーザーのタスクをCSVまたはJSON Lines形式でダウンロードする
+
+    一覧と同じフィルタリング・ソート・検索のパラメータを受け付け、
+    全件（ページネーションなし）をストリーミングで返す。
+
+    Args:
+        request (HttpRequest): HTTPリクエストオブジェクト（format=csv | ndjson）
+
+    Returns:
+        StreamingHttpResponse: エクスポートしたタスク
+    """
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest('不正な形式です')
+    content_type, extension = EXPORT_FORMATS[export_format]
+
+    params = task_list_cache.normalize(request.GET)
+    tasks = Task.objects.filter(user=request.user)
+    tasks = filter_tasks(
+        tasks, params.get('category'), params.get('priority'), params.get('completed'), params.get('search', ''),
+    )
+    tasks = sort_tasks(tasks, params.get('sort', '-created_date'))
+    # ストリーミングはビューから戻った後に読むため、ここで読み込み先（複製）を決めておく
+    tasks = tasks.using(tasks.db)
+
+    response = StreamingHttpResponse(stream_tasks(tasks, export_format), content_type=content_type)
+    filename = f'tasks-{timezone.localdate():%Y%m%d}.{extension}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@require_POST
+@login_required
+def task_import(request):
+    """アップロードされたCSVまたはJSON Linesのファイルからタスクを一括で作成する
+
+    フォームの 'file' でファイルを受け取る。形式は 'format'、省略時は拡張子で判定する。
+    不正な行は保存せず、行番号とエラーを返す（正しい行は保存する）。
+
+    Args:
+        request (HttpRequest): HTTPリクエストオブジェクト
+
+    Returns:
+        JsonResponse: 作成件数、エラー行、処理時間を含むJSON応答
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'status': 'error', 'message': 'ファイルを指定してください'}, status=400)
+    import_format = request.POST.get('format') or guess_format(upload.name)
+    if import_format not in IMPORT_FORMATS:
+        return JsonResponse({'status': 'error', 'message': '不正な形式です'}, status=400)
+
+    try:
+        result = import_tasks(request.user, upload.file, import_format)
+    except (UnicodeDecodeError, csv.Error):
+        return JsonResponse({'status': 'error', 'message': 'ファイルを読み込めません'}, status=400)
+    return JsonResponse({'status': 'success', **result.as_dict(max_errors=IMPORT_MAX_ERRORS)})
+
+@query_budget(8)
+@login_required
+def task_summary(request):
+    """ログインユーザーのタスクの件数（未完了・完了・期限切れ、優先度別、カテゴリ別）を返す
+
+    タスクの変更時に更新している集計行を読むだけで、タスク表の集計は行わない。
+
+    Args:
+        request (HttpRequest): HTTPリクエストオブジェクト
+
+    Returns:
+        JsonResponse: タスクの件数
+    """
+    return JsonResponse(summary(get_stats(request.user.pk)))
+
+@query_budget(3)
+@login_required
+def cache_stats(request):
+    """タスク一覧とログインユーザーのキャッシュのヒット数とミス数、変更の配信の接続数を返す（監視用、スタッフのみ）
+
+    Args:
+        request (HttpRequest): HTTPリクエストオブジェクト
+
+    Returns:
+        JsonResponse: このプロセスでのヒット数とミス数
+
+    Raises:
+        PermissionDenied: スタッフ以外のユーザーの場合
+    """
+    if not request.user.is_staff:
+        raise PermissionDenied
+    stats = {'task_list': task_list_cache.stats(), 'user': user_cache.stats()}
+    broker = get_broker()
+    if hasattr(broker, 'stats'):
+        stats['events'] = broker.stats()
+    return JsonResponse(stats)
+
+def metrics(request):
+    """ビューごとの処理時間・クエリ数のヒストグラムをPrometheusのテキスト形式で返す（このプロセスの分）
+
+    スタッフのユーザー、または settings.TODO_METRICS_TOKEN を
+    Authorization: Bearer で送ったクライアント（収集用）のみ読める。
+
+    Args:
+        request (HttpRequest): HTTPリクエストオブジェクト
+
+    Returns:
+        HttpResponse: Prometheusのテキスト形式のメトリクス
+
+    Raises:
+        PermissionDenied: スタッフでもトークンも正しくない場合
+    """
+    token = settings.TODO_METRICS_TOKEN
+    authorized = bool(token) and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    if not authorized and not request.user.is_staff:
+        raise PermissionDenied
+    return HttpResponse(view_metrics.prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 def register(request):
     """新規ユーザーを登録する
 
@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "todoproject.settings")
+# ASGIでは一覧・詳細・完了状態の切り替えを非同期ビューで処理する（TODO_ASYNC_VIEWS=0 で同期ビュー）
+os.environ.setdefault("TODO_ASYNC_VIEWS", "1")
+# タスクの変更の配信（/events/ の Server-Sent Events）は接続ごとにスレッドを使わないよう、
+# ASGIで動かす（uvicorn todoproject.asgi:application など）
 
 application = get_asgi_application()
@@ -0,0 +1,97 @@
+"""
+DATABASE_URL と DATABASE_PROFILE から settings.DATABASES の設定を作る
+
+DATABASE_URL:
+    sqlite:///db.sqlite3（相対パスはプロジェクトのルートから）
+    postgres://ユーザー:パスワード@ホスト:ポート/データベース名
+
+DATABASE_PROFILE:
+    development: Djangoの既定値（リクエストごとに接続し、SQLiteのジャーナルは既定のまま）
+    production: 接続を使い回し、SQLiteはWALモードなどのPRAGMAを接続時に設定する
+"""
+
+from pathlib import Path
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import django
+
+DATABASE_PROFILES = ('development', 'production')
+
+# productionでSQLiteの接続ごとに設定するPRAGMA
+# WAL: 書き込み中も読み込みをブロックしない / synchronous=NORMAL: WALではコミットごとのfsyncを省いても壊れない
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # 負の値はKiB単位（約64MB）
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# productionで接続を使い回す秒数
+PRODUCTION_CONN_MAX_AGE = 60
+
+
+def database_config(url, profile='development', base_dir=None, pool=False):
+    """データベースURLとプロファイルから DATABASES['default'] の辞書を作る
+
+    Args:
+        url (str): データベースURL
+        profile (str): 'development' または 'production'
+        base_dir (Path): SQLiteの相対パスの基準ディレクトリ
+        pool (bool): PostgreSQLで接続プールを使うか（Django 5.1以降と psycopg[pool] が必要）
+
+    Returns:
+        tuple: (DATABASES['default'] の辞書, SQLiteのPRAGMAの辞書)
+    """
+    if profile not in DATABASE_PROFILES:
+        raise ValueError(f'DATABASE_PROFILE は {", ".join(DATABASE_PROFILES)} のいずれか: {profile}')
+    production = profile == 'production'
+    parts = urlsplit(url)
+    options = dict(parse_qsl(parts.query))
+
+    if parts.scheme == 'sqlite':
+        path = unquote(parts.path)
+        # sqlite:///db.sqlite3 は相対パス、sqlite:////var/db.sqlite3 は絶対パス
+        path = path[1:] if path.startswith('/') else path
+        name = Path(path)
+        if path != ':memory:' and not name.is_absolute() and base_dir is not None:
+            name = Path(base_dir) / name
+        config = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': str(name),
+            'OPTIONS': options,
+        }
+        pragmas = {}
+        if production:
+            pragmas = dict(SQLITE_PRODUCTION_PRAGMAS)
+            config['CONN_MAX_AGE'] = PRODUCTION_CONN_MAX_AGE
+            # ロックの解除を待つ秒数（既定は5秒）
+            config['OPTIONS'].setdefault('timeout', 20)
+            if django.VERSION >= (5, 1):
+                # 書き込むトランザクションは最初から書き込みロックを取り、
+                # 読み込みロックからの昇格で待たずに失敗する（database is locked）のを防ぐ
+                config['OPTIONS'].setdefault('transaction_mode', 'IMMEDIATE')
+        return config, pragmas
+
+    if parts.scheme in ('postgres', 'postgresql', 'pgsql'):
+        config = {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': unquote(parts.path.lstrip('/')),
+            'USER': unquote(parts.username or ''),
+            'PASSWORD': unquote(parts.password or ''),
+            'HOST': parts.hostname or '',
+            'PORT': str(parts.port or ''),
+            'OPTIONS': options,
+        }
+        if production:
+            if pool:
+                # 接続プールを使う場合は CONN_MAX_AGE を0にする必要がある
+                config['OPTIONS']['pool'] = True
+            else:
+                config['CONN_MAX_AGE'] = PRODUCTION_CONN_MAX_AGE
+                # 使い回す接続がサーバー側で切れていないかを、リクエストの最初に確認する
+                config['CONN_HEALTH_CHECKS'] = True
+        return config, {}
+
+    raise ValueError(f'未対応のデータベースURLです: {url}')
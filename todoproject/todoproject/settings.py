@@ -14,6 +14,8 @@ import os
 from dotenv import load_dotenv
 from pathlib import Path
 
+from .database import database_config
+
 # .envファイルから環境変数を読み込む
 load_dotenv()
 
@@ -28,9 +30,10 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.getenv('SECRET_KEY')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# 本番環境では DEBUG=0 と、配信するホスト名（カンマ区切り）の ALLOWED_HOSTS を設定する
+DEBUG = os.getenv('DEBUG', '1').lower() in ('1', 'true', 'yes')
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [host for host in os.getenv('ALLOWED_HOSTS', '').split(',') if host]
 
 
 # Application definition
@@ -47,11 +50,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # リクエスト全体（セッションとユーザーの読み込みを含む）を測るため先頭に置く
+    "todo.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # ログインユーザーをプロセス内にキャッシュする AuthenticationMiddleware（todo.caches.UserCache）
+    "todo.middleware.CachedAuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -80,12 +86,69 @@ WSGI_APPLICATION = "todoproject.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# DATABASE_URL でデータベースを、DATABASE_PROFILE（development / production）で
+# 接続の使い回しやSQLiteのPRAGMAなどの設定を選ぶ（todoproject/database.py）
+DATABASE_PROFILE = os.getenv('DATABASE_PROFILE', 'development')
+
+_database_pool = os.getenv('DATABASE_POOL', '').lower() in ('1', 'true', 'yes')
+_default_database, TODO_SQLITE_PRAGMAS = database_config(
+    os.getenv('DATABASE_URL', 'sqlite:///db.sqlite3'),
+    DATABASE_PROFILE,
+    base_dir=BASE_DIR,
+    pool=_database_pool,
+)
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    'default': _default_database,
+}
+
+# DATABASE_REPLICA_URL を指定すると、読み込みだけのビュー（一覧・詳細・エクスポート）の
+# タスクの読み込みを複製へ送る（todo.db.PrimaryReplicaRouter）。
+# ローカルでは sqlite:///replica.sqlite3 を指定し、python manage.py sync_replica で主からコピーする
+TODO_REPLICA_DATABASE = 'replica'
+DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL', '')
+if DATABASE_REPLICA_URL:
+    DATABASES[TODO_REPLICA_DATABASE], _ = database_config(
+        DATABASE_REPLICA_URL, DATABASE_PROFILE, base_dir=BASE_DIR, pool=_database_pool,
+    )
+    # テストでは複製のデータベースを作らず、default をそのまま使う
+    DATABASES[TODO_REPLICA_DATABASE]['TEST'] = {'MIRROR': 'default'}
+DATABASE_ROUTERS = ['todo.db.PrimaryReplicaRouter']
+# タスクを書き込んだユーザーの読み込みを主へ送り続ける秒数（複製の遅れより長くする）
+TODO_REPLICA_PIN_SECONDS = float(os.getenv('TODO_REPLICA_PIN_SECONDS', 5))
+
+# 読み込んだテンプレートのコンパイル結果をプロセス内に保持するか（cached.Loader）
+# 既定では DEBUG でないとき（本番環境）に有効にする（テンプレートの変更はプロセスの再起動で反映される）。
+# 無効のときは毎回テンプレートを読み直す。loaders を指定しないと Django 4.1 以降は
+# DEBUG でも cached.Loader を使うため、どちらの場合もローダーを明示する
+TODO_TEMPLATE_CACHE = os.getenv('TODO_TEMPLATE_CACHE', '0' if DEBUG else '1').lower() in ('1', 'true', 'yes')
+_template_loaders = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = (
+    [('django.template.loaders.cached.Loader', _template_loaders)] if TODO_TEMPLATE_CACHE else _template_loaders
+)
+
+
+# セッションの保存先を SESSION_PROFILE で選ぶ
+#   cached_db: キャッシュから読み、書き込みはキャッシュとデータベースの両方（既定。キャッシュが消えてもログインは保たれる）
+#   db: データベースのみ（Djangoの既定）
+#   signed_cookies: 署名付きクッキーに保存し、サーバー側では読み書きしない
+#     （ログアウトしても、盗まれたクッキーは SESSION_COOKIE_AGE まで使える点に注意）
+# 複数のプロセスで cached_db を使う場合は CACHES を共有のキャッシュ（Redis / Memcached）にする
+SESSION_ENGINES = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'db': 'django.contrib.sessions.backends.db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
 }
+SESSION_PROFILE = os.getenv('SESSION_PROFILE', 'cached_db')
+if SESSION_PROFILE not in SESSION_ENGINES:
+    raise ValueError(f'SESSION_PROFILE は {", ".join(SESSION_ENGINES)} のいずれか: {SESSION_PROFILE}')
+SESSION_ENGINE = SESSION_ENGINES[SESSION_PROFILE]
+
+# メッセージ（messages.success など）はクッキーに保存し、リダイレクトのたびにセッションを書き込まない
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
 
 
 # Password validation
@@ -129,9 +192,90 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "static"),
 ]
 
+# 静的ファイルの配信を STATIC_PROFILE で選ぶ（todo/assets.py）
+#   development: ファイル名はそのまま。DEBUG のときに staticfiles が配信し、ブラウザはページごとに再検証する
+#   production: collectstatic でハッシュ付きのファイル名と圧縮済みのファイル（.gz / .br）を STATIC_ROOT に書き出し、
+#     todo.assets.serve_static が1年間の immutable なキャッシュを指定して配信する
+STATIC_PROFILES = ('development', 'production')
+STATIC_PROFILE = os.getenv('STATIC_PROFILE', 'development')
+if STATIC_PROFILE not in STATIC_PROFILES:
+    raise ValueError(f'STATIC_PROFILE は {", ".join(STATIC_PROFILES)} のいずれか: {STATIC_PROFILE}')
+STATIC_ROOT = os.getenv('STATIC_ROOT', BASE_DIR / 'staticfiles')
+if STATIC_PROFILE == 'production':
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'todo.assets.CompressedManifestStaticFilesStorage'},
+    }
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 LOGIN_REDIRECT_URL = 'task_list'
-LOGIN_URL = 'login'
\ No newline at end of file
+LOGIN_URL = 'login'
+
+# タスク一覧のページネーション方式
+# 'offset': ページ番号方式（既定。?page=N のブックマークが使える）
+# 'keyset': カーソル方式（COUNT(*)とOFFSETを使わない。ページのリンクは前へ・次へだけになる）
+TODO_PAGINATION = os.getenv('TODO_PAGINATION', 'offset')
+
+# レンダリング済みのタスク一覧をユーザーごとにキャッシュする秒数（0で無効）
+TODO_LIST_CACHE_TIMEOUT = int(os.getenv('TODO_LIST_CACHE_TIMEOUT', 300))
+
+# ログインユーザー（request.user）をプロセス内にキャッシュする秒数（0で無効）
+TODO_USER_CACHE_TIMEOUT = int(os.getenv('TODO_USER_CACHE_TIMEOUT', 300))
+
+# タスク一覧の絞り込みフォームと表の見出し（{% cache %} のフラグメント）をキャッシュする秒数（0で無効）
+TODO_FRAGMENT_CACHE_TIMEOUT = int(os.getenv('TODO_FRAGMENT_CACHE_TIMEOUT', 300))
+
+# ビューが query_budget で宣言したクエリ数の上限を超えたときに例外を送出するか（偽なら警告のみ）
+# 例外はビューの書き込みがコミットされた後に送出されるため、既定では無効にする。
+# テスト（python manage.py test）では TEST_RUNNER が有効にする
+TODO_QUERY_BUDGET_STRICT = os.getenv('TODO_QUERY_BUDGET_STRICT', '0').lower() in ('1', 'true', 'yes')
+TEST_RUNNER = 'todoproject.test_runner.StrictQueryBudgetRunner'
+
+# リクエストごとの計測（todo.middleware.PerformanceMiddleware）のログ
+# 1リクエストごとのJSONはINFO、クエリ数の上限を超えたリクエストはWARNING
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'todo.performance': {
+            'handlers': ['console'],
+            'level': os.getenv('TODO_PERFORMANCE_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+        # リマインダー（LogSink の出力）
+        'todo.reminders': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# リマインダーの送信先（todo.reminders の LogSink / EmailSink / WebhookSink、または send(reminders) を持つクラス）
+TODO_REMINDER_SINK = os.getenv('TODO_REMINDER_SINK', 'todo.reminders.LogSink')
+TODO_REMINDER_WEBHOOK_URL = os.getenv('TODO_REMINDER_WEBHOOK_URL', '')
+
+# 完了したタスクをアーカイブ（todo.archive）へ移すまでの日数（最終更新からの日数）
+# archive_tasks コマンドの --older-than-days の既定値
+TODO_ARCHIVE_AFTER_DAYS = float(os.getenv('TODO_ARCHIVE_AFTER_DAYS', 90))
+
+# タスクの変更を一覧へ配るブローカー（todo.events.InMemoryBroker、または publish / subscribe /
+# last_event_id を持つクラス）。InMemoryBroker はプロセス内だけで配る
+TODO_EVENT_BROKER = os.getenv('TODO_EVENT_BROKER', 'todo.events.InMemoryBroker')
+# Server-Sent Events の接続にコメントを送る間隔（秒）と、接続を閉じるまでの秒数（ブラウザが再接続する）
+TODO_EVENT_KEEPALIVE = float(os.getenv('TODO_EVENT_KEEPALIVE', 15))
+TODO_EVENT_STREAM_TIMEOUT = float(os.getenv('TODO_EVENT_STREAM_TIMEOUT', 3600))
+
+# /monitoring/metrics/ をスタッフ以外（Prometheusなど）が読むためのトークン
+# Authorization: Bearer <トークン> で送る（空ならスタッフのみ）
+TODO_METRICS_TOKEN = os.getenv('TODO_METRICS_TOKEN', '')
+
+# タスク一覧・詳細・完了状態の切り替えに非同期版のビュー（todo.async_views）を使うか
+# asgi.py から起動した場合の既定値は有効
+TODO_ASYNC_VIEWS = os.getenv('TODO_ASYNC_VIEWS', '').lower() in ('1', 'true', 'yes')
@@ -0,0 +1,18 @@
+"""
+テストの実行（python manage.py test）の設定
+"""
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class StrictQueryBudgetRunner(DiscoverRunner):
+    """ビューがクエリ数の上限（query_budget）を超えたらテストを失敗させる
+
+    開発中や本番では上限を超えても警告だけを出す（settings.TODO_QUERY_BUDGET_STRICT の既定は偽）。
+    テストとCIでは例外にし、上限を超えたビューに気付けるようにする。
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.TODO_QUERY_BUDGET_STRICT = True
@@ -1,9 +1,10 @@
 from django.contrib import admin
 from django.conf import settings
-from django.conf.urls.static import static
-from django.urls import path, include
+from django.contrib.staticfiles.urls import staticfiles_urlpatterns
+from django.urls import path, include, re_path
 from django.contrib.auth import views as auth_views
 from todo import views as todo_views
+from todo.assets import serve_static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -13,5 +14,8 @@ urlpatterns = [
     path('', include('todo.urls')),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
+if settings.STATIC_PROFILE == 'production':
+    # collectstatic で書き出したハッシュ付き・圧縮済みのファイルを長期キャッシュで配信する
+    urlpatterns += [re_path(rf'^{settings.STATIC_URL.strip("/")}/(?P<path>.+)$', serve_static, name='static')]
+elif settings.DEBUG:
+    urlpatterns += staticfiles_urlpatterns()